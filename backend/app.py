@@ -1,22 +1,77 @@
-from flask import Flask, request, jsonify
-from flask_restful import Api, Resource, reqparse
+from flask import Flask, Response, request, jsonify, stream_with_context
+from flask_restful import Api, Resource, inputs, reqparse
 from flask_cors import CORS
 from flask_migrate import Migrate
+from sqlalchemy.orm import joinedload, selectinload
 from config import Config
-from models import db, Exercise, Routine, Variation
+from models import db, Exercise, Routine, Variation, VariationType
+from sqlite_profile import sqlite_profile
+from queries import exercise_details, get_routine_variations
+from batch import apply_variation_batch
+from group_commit import group_commit
+from pagination import add_page_arguments, is_paginated, get_page_limit, paginate
+from fieldsets import Fieldset, add_fieldset_arguments, parse_fieldset
+from versions import conditional_get, get_versions
+from cache import cache
+from search import search_exercises, paginate_search, decode_search_cursor
+from suggest import suggest_index
+from variation_types import variation_type_cache
+from stats import stats_cache
+from changes import get_changes, compact_changes_command, SEQ_KEY
+from events import event_hub
+from transfer import TABLES, export_lines, import_lines, export_command, import_command
+from serializers import serialize, serialize_all
+from representations import output_json
+from streaming import stream_json_array
+from compression import response_compression
+from timing import request_timing, timed
+from metrics import request_metrics
 
 # Create Flask app
 app = Flask(__name__)
 app.config.from_object(Config)
 
-# Initialize database
+# Initialize database (PRAGMAs and pool options first)
+sqlite_profile.init_app(app)
 db.init_app(app)
 
 # Initialize migrations
 migrate = Migrate(app, db)
 
+# Initialize response cache
+cache.init_app(app)
+
+# Build the exercise name typeahead index
+suggest_index.init_app(app)
+
+# Keep the variation type list in memory
+variation_type_cache.init_app(app)
+
+# NDJSON export/import commands (flask export, flask import)
+app.cli.add_command(export_command)
+app.cli.add_command(import_command)
+
+# Change log compaction (flask compact-changes)
+app.cli.add_command(compact_changes_command)
+
+# Time db, serialization and encoding for the Server-Timing header
+request_timing.init_app(app)
+
+# Prometheus metrics at /metrics
+request_metrics.init_app(app)
+
+# Optional writer thread that commits writes in groups
+group_commit.init_app(app)
+
+# gzip/brotli response bodies (last, so the timings above include it)
+response_compression.init_app(app)
+
+# Push committed changes to Server-Sent Events streams
+event_hub.init_app(app)
+
 # Initialize RESTful API
 api = Api(app)
+api.representations['application/json'] = timed('encode')(output_json)
 
 # Configure CORS
 CORS(app, 
@@ -45,16 +100,17 @@ def home():
         "message": "Welcome to the Workout Tracker API",
         "endpoints": {
             # Routine endpoints
-            "GET /api/routines": "Get all routines",
+            "GET /api/routines": "Get all routines (?limit=&after= to paginate, ?stream=true to stream the full list)",
             "GET /api/routines/:id": "Get a specific routine",
             "POST /api/routines": "Create a new routine",
             "PUT /api/routines/:id": "Update a routine",
             "DELETE /api/routines/:id": "Delete a routine",
             
             # Exercise endpoints
-            "GET /api/exercises": "Get all exercises",
+            "GET /api/exercises": "Get all exercises (?limit=&after= to paginate, ?search= for ranked full-text search, ?stream=true to stream the full list)",
             "GET /api/exercises/:id": "Get a specific exercise",
             "POST /api/exercises": "Create a new exercise",
+            "GET /api/exercises/suggest?q=": "Typo-tolerant exercise name suggestions",
             
             # Variation endpoints (join table between routines and exercises)
             "GET /api/routines/:routine_id/variations": "Get all variations for a routine",
@@ -62,21 +118,84 @@ def home():
             "GET /api/routines/:routine_id/variations/:variation_id": "Get a specific variation",
             "PUT /api/routines/:routine_id/variations/:variation_id": "Update a variation",
             "DELETE /api/routines/:routine_id/variations/:variation_id": "Delete a variation",
+            "POST /api/routines/:routine_id/variations/batch": "Create, update and delete many variations in one transaction",
             
             # Variation Types
-            "GET /api/variation-types": "Get all unique variation types",
-            "POST /api/variation-types": "Create a new variation type"
+            "GET /api/variation-types": "Get all variation types",
+            "POST /api/variation-types": "Create a new variation type",
+            
+            # Initial load
+            "GET /api/bootstrap": "Get routines, exercises and variation types in one response, variations referencing exercises by id",
+            
+            # Dashboard statistics
+            "GET /api/stats": "Get counts by day, variation type, muscle group and equipment (?routine_id=&day_of_week= to filter)",
+            
+            # Delta sync
+            "GET /api/changes": "Get rows changed after ?since=<seq> as upserts and tombstones, with the seq to continue from",
+            
+            # Change notifications
+            "GET /api/events": "Server-Sent Events stream of committed changes (Last-Event-ID or ?last_event_id= to resume)",
+            
+            # Export / import
+            "GET /api/export": "Stream exercises, routines and variations as NDJSON",
+            "GET /api/export/:table": "Stream one table as NDJSON",
+            "POST /api/import": "Import an NDJSON export under new ids",
+            
+            # Diagnostics
+            "GET /api/cache/stats": "Get response cache hit/miss/eviction counters",
+            "GET /api/exercises/suggest/stats": "Get typeahead index size and memory footprint",
+            "GET /metrics": "Prometheus metrics for requests, the connection pool and caches"
         }
     })
 
+# Response cache statistics
+@app.route('/api/cache/stats')
+def cache_stats():
+    return jsonify(cache.stats())
+
 # Define API Resources
 
 # Routine Resources
 class RoutineListResource(Resource):
+    @conditional_get('routines', 'variations', 'exercises')
     def get(self):
-        """Get all routines"""
-        routines = Routine.query.all()
-        return [routine.to_dict() for routine in routines], 200
+        """Get all routines, or one page of them if ?limit= or ?after= is given"""
+        parser = reqparse.RequestParser()
+        parser.add_argument('stream', type=inputs.boolean, location='args', default=False)
+        add_page_arguments(parser)
+        add_fieldset_arguments(parser)
+        args = parser.parse_args()
+        
+        try:
+            fieldset = parse_fieldset(Routine, args)
+            limit = get_page_limit(args) if is_paginated(args) else None
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        
+        if fieldset:
+            query = Routine.query.options(*fieldset.options())
+            only = fieldset.only
+        elif args['stream'] and limit is None:
+            # Streamed rows come in chunks, which can't joinedload a collection
+            query = Routine.query.options(
+                selectinload(Routine.variations).joinedload(Variation.exercise)
+            )
+            only = ()
+        else:
+            # Load the routine -> variation -> exercise graph in one query so
+            # serializing doesn't lazy load it one row at a time
+            query = Routine.query.options(
+                joinedload(Routine.variations).joinedload(Variation.exercise)
+            )
+            only = ()
+        
+        if limit is None:
+            if args['stream']:
+                return stream_json_array(query.order_by(Routine.id), only)
+            return serialize_all(query.order_by(Routine.id).all(), only=only), 200
+        
+        routines, next_cursor = paginate(query, Routine.id, limit, args['after'])
+        return {"items": serialize_all(routines, only=only), "next_cursor": next_cursor}, 200
 
     def post(self):
         """Create a new routine"""
@@ -86,7 +205,7 @@ class RoutineListResource(Resource):
         if not data.get('name'):
             return {"error": "Routine name is required"}, 400
         
-        try:
+        def create():
             routine = Routine(
                 name=data['name'],
                 day_of_week=data.get('day_of_week'),
@@ -94,9 +213,13 @@ class RoutineListResource(Resource):
             )
             
             db.session.add(routine)
-            db.session.commit()
-            
-            return routine.to_dict(), 201
+            db.session.flush()
+            return routine.id
+        
+        try:
+            routine_id = group_commit.run(create)
+            # Read the row back so values are serialized as they are stored
+            return serialize(Routine.query.get(routine_id)), 201
         except ValueError as e:
             return {"error": str(e)}, 400
         except Exception as e:
@@ -104,25 +227,37 @@ class RoutineListResource(Resource):
             return {"error": "An error occurred while creating the routine"}, 500
 
 class RoutineResource(Resource):
+    # The detail nests each exercise's variations in other routines too
+    @conditional_get('routines', 'variations', 'exercises')
     def get(self, routine_id):
         """Get a specific routine with all its variations"""
-        routine = Routine.query.get(routine_id)
+        args = add_fieldset_arguments(reqparse.RequestParser()).parse_args()
+        try:
+            fieldset = parse_fieldset(Routine, args)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        
+        if fieldset:
+            routine = Routine.query.options(*fieldset.options()).get(routine_id)
+        else:
+            routine = Routine.query.get(routine_id)
         if not routine:
             return {"error": "Routine not found"}, 404
         
-        # Get the routine with its variations and related exercises
-        routine_dict = routine.to_dict()
+        if fieldset:
+            return serialize(routine, only=fieldset.only), 200
         
-        # Get all variations for this routine
-        variations = Variation.query.filter_by(routine_id=routine_id).all()
+        # Variations are serialized below with their exercises, so skip them here
+        routine_dict = serialize(routine, rules=('-variations',))
+        
+        # Get all variations for this routine along with their exercises
+        variations = get_routine_variations(routine_id)
         variations_with_exercises = []
         
         for variation in variations:
-            var_dict = variation.to_dict()
-            # Get the associated exercise
-            exercise = Exercise.query.get(variation.exercise_id)
-            if exercise:
-                var_dict['exercise'] = exercise.to_dict()
+            var_dict = serialize(variation)
+            if variation.exercise:
+                var_dict['exercise'] = serialize(variation.exercise)
             variations_with_exercises.append(var_dict)
         
         routine_dict['variations'] = variations_with_exercises
@@ -137,7 +272,11 @@ class RoutineResource(Resource):
         
         data = request.get_json()
         
-        try:
+        def update():
+            routine = Routine.query.get(routine_id)
+            if not routine:
+                return False
+            
             # Update fields if provided
             if 'name' in data:
                 routine.name = data['name']
@@ -146,8 +285,16 @@ class RoutineResource(Resource):
             if 'description' in data:
                 routine.description = data['description']
             
-            db.session.commit()
-            return routine.to_dict(), 200
+            db.session.flush()
+            return True
+        
+        try:
+            if not group_commit.run(update):
+                return {"error": "Routine not found"}, 404
+            routine = Routine.query.options(
+                selectinload(Routine.variations).joinedload(Variation.exercise)
+            ).populate_existing().get(routine_id)
+            return serialize(routine), 200
         except ValueError as e:
             return {"error": str(e)}, 400
         except Exception as e:
@@ -160,9 +307,16 @@ class RoutineResource(Resource):
         if not routine:
             return {"error": "Routine not found"}, 404
         
-        try:
+        def delete():
+            routine = Routine.query.get(routine_id)
+            if not routine:
+                return False
             db.session.delete(routine)
-            db.session.commit()
+            return True
+        
+        try:
+            if not group_commit.run(delete):
+                return {"error": "Routine not found"}, 404
             return {"message": "Routine deleted successfully"}, 200
         except Exception as e:
             db.session.rollback()
@@ -170,29 +324,63 @@ class RoutineResource(Resource):
 
 # Exercise Resources
 class ExerciseListResource(Resource):
+    @conditional_get('exercises', 'variations', 'routines')
+    @cache.cached('exercises', 'exercises', 'variations', 'routines')
     def get(self):
-        """Get all exercises with optional filtering"""
+        """Get all exercises with optional filtering and pagination"""
         # Get query parameters
         parser = reqparse.RequestParser()
         parser.add_argument('muscle_group', type=str, location='args')
         parser.add_argument('equipment', type=str, location='args')
         parser.add_argument('search', type=str, location='args')
+        parser.add_argument('stream', type=inputs.boolean, location='args', default=False)
+        # Search results are ranked by relevance and paged by (rank, id)
+        # cursors, everything else by id
+        add_page_arguments(parser, cursor_type=str)
+        add_fieldset_arguments(parser)
         args = parser.parse_args()
         
+        try:
+            fieldset = parse_fieldset(Exercise, args)
+            limit = get_page_limit(args) if is_paginated(args) else None
+            after = args['after']
+            if after is not None and args['search']:
+                after = decode_search_cursor(after)
+            elif after is not None:
+                if not after.isdigit():
+                    raise ValueError("after must be an exercise id")
+                after = int(after)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        
         # Start with base query
         query = Exercise.query
+        only = ()
+        if fieldset:
+            query = query.options(*fieldset.options())
+            only = fieldset.only
+        else:
+            query = query.options(exercise_details())
         
         # Apply filters if provided
         if args['muscle_group']:
             query = query.filter(Exercise.muscle_group == args['muscle_group'])
         if args['equipment']:
             query = query.filter(Exercise.equipment == args['equipment'])
-        if args['search']:
-            query = query.filter(Exercise.name.ilike(f'%{args["search"]}%'))
+        if args['search'] and limit is None:
+            query = search_exercises(query, args['search'])
         
         # Execute query and return results
-        exercises = query.all()
-        return [exercise.to_dict() for exercise in exercises], 200
+        if limit is None:
+            if args['stream']:
+                return stream_json_array(query.order_by(Exercise.id), only)
+            return serialize_all(query.order_by(Exercise.id).all(), only=only), 200
+        
+        if args['search']:
+            exercises, next_cursor = paginate_search(query, args['search'], limit, after)
+        else:
+            exercises, next_cursor = paginate(query, Exercise.id, limit, after)
+        return {"items": serialize_all(exercises, only=only), "next_cursor": next_cursor}, 200
 
     def post(self):
         """Create a new exercise"""
@@ -202,7 +390,7 @@ class ExerciseListResource(Resource):
         if not data.get('name'):
             return {"error": "Exercise name is required"}, 400
         
-        try:
+        def create():
             exercise = Exercise(
                 name=data['name'],
                 description=data.get('description'),
@@ -211,9 +399,15 @@ class ExerciseListResource(Resource):
             )
             
             db.session.add(exercise)
-            db.session.commit()
+            db.session.flush()
+            return exercise.id
+        
+        try:
+            exercise = Exercise.query.get(group_commit.run(create))
+            
+            suggest_index.add(exercise.id, exercise.name)
             
-            return exercise.to_dict(), 201
+            return serialize(exercise), 201
         except ValueError as e:
             return {"error": str(e)}, 400
         except Exception as e:
@@ -221,32 +415,74 @@ class ExerciseListResource(Resource):
             return {"error": "An error occurred while creating the exercise"}, 500
 
 class ExerciseResource(Resource):
+    @cache.cached('exercises:{exercise_id}', 'exercises', 'variations', 'routines')
     def get(self, exercise_id):
         """Get a specific exercise"""
-        exercise = Exercise.query.get(exercise_id)
+        args = add_fieldset_arguments(reqparse.RequestParser()).parse_args()
+        try:
+            fieldset = parse_fieldset(Exercise, args)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        
+        if fieldset:
+            exercise = Exercise.query.options(*fieldset.options()).get(exercise_id)
+        else:
+            exercise = Exercise.query.options(exercise_details()).get(exercise_id)
         if not exercise:
             return {"error": "Exercise not found"}, 404
         
-        return exercise.to_dict(), 200
+        if fieldset:
+            return serialize(exercise, only=fieldset.only), 200
+        return serialize(exercise), 200
+
+class ExerciseSuggestResource(Resource):
+    def get(self):
+        """Get exercise name suggestions for a partially typed query"""
+        parser = reqparse.RequestParser()
+        parser.add_argument('q', type=str, location='args', default='')
+        parser.add_argument('limit', type=int, location='args', default=10)
+        args = parser.parse_args()
+        
+        if args['limit'] < 1 or args['limit'] > 50:
+            return {"error": "limit must be between 1 and 50"}, 400
+        
+        suggest_index.refresh()
+        return suggest_index.suggest(args['q'], args['limit']), 200
+
+class ExerciseSuggestStatsResource(Resource):
+    def get(self):
+        """Get the size and memory footprint of the suggestion index"""
+        return suggest_index.stats(), 200
 
 # Variation Resources (join table between routines and exercises)
 class VariationListResource(Resource):
     def get(self, routine_id):
         """Get all variations for a specific routine"""
+        args = add_fieldset_arguments(reqparse.RequestParser()).parse_args()
+        try:
+            fieldset = parse_fieldset(Variation, args)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        
         routine = Routine.query.get(routine_id)
         if not routine:
             return {"error": "Routine not found"}, 404
         
-        # Get all variations for this routine
-        variations = Variation.query.filter_by(routine_id=routine_id).all()
+        if fieldset:
+            variations = Variation.query.options(*fieldset.options()).filter_by(
+                routine_id=routine_id
+            ).order_by(Variation.id).all()
+            return serialize_all(variations, only=fieldset.only), 200
+        
+        # Get all variations for this routine along with their exercises
+        variations = get_routine_variations(routine_id)
         
         # Include the exercise details with each variation
         result = []
         for variation in variations:
-            variation_dict = variation.to_dict()
-            exercise = Exercise.query.get(variation.exercise_id)
-            if exercise:
-                variation_dict['exercise'] = exercise.to_dict()
+            variation_dict = serialize(variation)
+            if variation.exercise:
+                variation_dict['exercise'] = serialize(variation.exercise)
             result.append(variation_dict)
             
         return result, 200
@@ -268,7 +504,11 @@ class VariationListResource(Resource):
         if not exercise:
             return {"error": "Exercise not found"}, 404
         
-        try:
+        def create():
+            exercise = Exercise.query.get(data['exercise_id'])
+            if not exercise:
+                return None
+            
             # Create variation
             variation = Variation(
                 exercise_id=data['exercise_id'],
@@ -278,11 +518,21 @@ class VariationListResource(Resource):
             )
             
             db.session.add(variation)
-            db.session.commit()
+            db.session.flush()
+            return variation.id
+        
+        try:
+            variation_id = group_commit.run(create)
+            if variation_id is None:
+                return {"error": "Exercise not found"}, 404
             
-            # Return the variation with the exercise details
-            result = variation.to_dict()
-            result['exercise'] = exercise.to_dict()
+            # Return the variation with the exercise details. The exercise
+            # can still be in the session, expired by the commit, and only
+            # a fresh load applies the eager loading
+            variation = Variation.query.get(variation_id)
+            exercise = Exercise.query.options(exercise_details()).populate_existing().get(variation.exercise_id)
+            result = serialize(variation)
+            result['exercise'] = serialize(exercise)
             
             return result, 201
         except ValueError as e:
@@ -294,17 +544,31 @@ class VariationListResource(Resource):
 class VariationResource(Resource):
     def get(self, routine_id, variation_id):
         """Get a specific variation"""
+        args = add_fieldset_arguments(reqparse.RequestParser()).parse_args()
+        try:
+            fieldset = parse_fieldset(Variation, args)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        
+        if fieldset:
+            variation = Variation.query.options(*fieldset.options()).filter_by(
+                id=variation_id, routine_id=routine_id
+            ).first()
+            if not variation:
+                return {"error": "Variation not found in this routine"}, 404
+            return serialize(variation, only=fieldset.only), 200
+        
         variation = Variation.query.get(variation_id)
         
         if not variation or variation.routine_id != routine_id:
             return {"error": "Variation not found in this routine"}, 404
         
         # Get the exercise details
-        exercise = Exercise.query.get(variation.exercise_id)
+        exercise = Exercise.query.options(exercise_details()).get(variation.exercise_id)
         
         # Return the variation with the exercise details
-        result = variation.to_dict()
-        result['exercise'] = exercise.to_dict()
+        result = serialize(variation)
+        result['exercise'] = serialize(exercise)
         
         return result, 200
 
@@ -317,7 +581,11 @@ class VariationResource(Resource):
         
         data = request.get_json()
         
-        try:
+        def update():
+            variation = Variation.query.get(variation_id)
+            if not variation or variation.routine_id != routine_id:
+                return False
+            
             # Update variation details
             if 'name' in data:
                 variation.name = data['name']
@@ -332,14 +600,20 @@ class VariationResource(Resource):
             if 'notes' in data:
                 variation.notes = data['notes']
             
-            db.session.commit()
+            db.session.flush()
+            return True
+        
+        try:
+            if not group_commit.run(update):
+                return {"error": "Variation not found in this routine"}, 404
             
             # Get the exercise details
-            exercise = Exercise.query.get(variation.exercise_id)
+            variation = Variation.query.get(variation_id)
+            exercise = Exercise.query.options(exercise_details()).populate_existing().get(variation.exercise_id)
             
             # Return the updated variation with exercise details
-            result = variation.to_dict()
-            result['exercise'] = exercise.to_dict()
+            result = serialize(variation)
+            result['exercise'] = serialize(exercise)
             
             return result, 200
         except ValueError as e:
@@ -355,71 +629,98 @@ class VariationResource(Resource):
         if not variation or variation.routine_id != routine_id:
             return {"error": "Variation not found in this routine"}, 404
         
-        try:
+        def delete():
+            variation = Variation.query.get(variation_id)
+            if not variation or variation.routine_id != routine_id:
+                return False
             db.session.delete(variation)
-            db.session.commit()
+            return True
+        
+        try:
+            if not group_commit.run(delete):
+                return {"error": "Variation not found in this routine"}, 404
             return {"message": "Variation deleted successfully"}, 200
         except Exception as e:
             db.session.rollback()
             return {"error": "An error occurred while deleting the variation"}, 500
 
+class VariationBatchResource(Resource):
+    def post(self, routine_id):
+        """Create, update and delete a routine's variations in one transaction"""
+        routine = Routine.query.get(routine_id)
+        if not routine:
+            return {"error": "Routine not found"}, 404
+        
+        operations = request.get_json()
+        if not isinstance(operations, list):
+            return {"error": "Expected a list of operations"}, 400
+        if len(operations) > app.config['MAX_BATCH_OPERATIONS']:
+            return {"error": f"At most {app.config['MAX_BATCH_OPERATIONS']} operations are allowed per batch"}, 400
+        
+        try:
+            results, ok = apply_variation_batch(routine_id, operations)
+        except Exception as e:
+            db.session.rollback()
+            return {"error": "An error occurred while applying the batch"}, 500
+        
+        if not ok:
+            return {"error": "No changes were applied", "results": results}, 400
+        return {"results": results}, 200
+
 
 
 class RoutineExercisesResource(Resource):
     def get(self, routine_id):
         """Get all exercises for a specific routine through variations"""
+        args = add_fieldset_arguments(reqparse.RequestParser()).parse_args()
+        try:
+            fieldset = parse_fieldset(Exercise, args)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        
         routine = Routine.query.get(routine_id)
         if not routine:
             return {"error": "Routine not found"}, 404
         
-        # Get all variations for this routine
-        variations = Variation.query.filter_by(routine_id=routine_id).all()
+        if fieldset:
+            # The fieldset applies to the exercises; each one still carries
+            # its variation's own columns
+            variations = Variation.query.options(
+                joinedload(Variation.exercise).options(*fieldset.options())
+            ).filter_by(routine_id=routine_id).order_by(Variation.id).all()
+            
+            variation_only = Fieldset(Variation).only
+            exercises = []
+            for variation in variations:
+                exercise_data = serialize(variation.exercise, only=fieldset.only)
+                exercise_data['variation'] = serialize(variation, only=variation_only)
+                exercises.append(exercise_data)
+            return exercises, 200
+        
+        # Get all variations for this routine along with their exercises
+        variations = get_routine_variations(routine_id)
         
         # Get the exercises through the variations
         exercises = []
         for variation in variations:
-            exercise = Exercise.query.get(variation.exercise_id)
+            exercise = variation.exercise
             if exercise:
-                exercise_data = exercise.to_dict()
+                exercise_data = serialize(exercise)
                 # Add variation data
-                exercise_data['variation'] = variation.to_dict()
+                exercise_data['variation'] = serialize(variation)
                 exercises.append(exercise_data)
         
         return exercises, 200
 
-# VariationTypes Resource - gets unique variation types from existing variations
+# VariationTypes Resource - variation types kept in their own table
 class VariationTypesResource(Resource):
+    @conditional_get('variation_types')
     def get(self):
-        """Get all unique variation types"""
-        # Query distinct variation types from the Variation table
-        variation_types = db.session.query(Variation.variation_type).distinct().all()
-        
-        # Convert to a list of strings and filter out None values
-        types = [t[0] for t in variation_types if t[0]]
-        
-        # Define default types to ensure these always exist
-        default_types = [
-            'Standard',
-            'Width Variation',
-            'Angle Variation',
-            'Grip Variation',
-            'Tempo Variation',
-            'Power',
-            'Endurance',
-            'Other'
-        ]
-        
-        # Add any default types that are not already in the list
-        for default_type in default_types:
-            if default_type not in types:
-                types.append(default_type)
-        
-        # Return as a list of objects for consistency with other endpoints
-        result = [{"id": i+1, "name": t, "description": "", "is_default": t in default_types} for i, t in enumerate(sorted(types))]
-        return result, 200
+        """Get all variation types"""
+        return variation_type_cache.all(), 200
 
     def post(self):
-        """Create a new variation type by adding a reference to it in the database"""
+        """Create a new variation type"""
         data = request.get_json()
         
         # Validate required fields
@@ -427,50 +728,151 @@ class VariationTypesResource(Resource):
             return {"error": "Variation type name is required"}, 400
             
         # Check if variation type already exists
-        variation_types = db.session.query(Variation.variation_type).distinct().all()
-        existing_types = [t[0] for t in variation_types if t[0]]
-        
-        if data['name'] in existing_types:
+        if data['name'] in variation_type_cache.names():
             return {"error": f"Variation type '{data['name']}' already exists"}, 400
-            
-        # Find a routine and exercise to use for the reference variation
-        routine = Routine.query.first()
-        exercise = Exercise.query.first()
         
-        if not routine or not exercise:
-            return {"error": "Cannot create variation type: no routines or exercises exist"}, 400
-            
-        # Create a variation with the new type to ensure it exists in the database
-        reference_variation = Variation(
-            exercise_id=exercise.id,
-            routine_id=routine.id,
-            name=f"Reference for type: {data['name']}",
-            variation_type=data['name']
-        )
+        def create():
+            variation_type = VariationType(
+                name=data['name'],
+                description=data.get('description', '')
+            )
+            db.session.add(variation_type)
+            db.session.flush()
+            return variation_type.id
         
         try:
-            db.session.add(reference_variation)
-            db.session.commit()
-            
-            return {
-                "id": len(existing_types) + 1,
-                "name": data['name'],
-                "description": data.get('description', ''),
-                "is_default": False
-            }, 201
+            variation_type = VariationType.query.get(group_commit.run(create))
+            return serialize(variation_type), 201
+        except ValueError as e:
+            return {"error": str(e)}, 400
         except Exception as e:
             db.session.rollback()
             return {"error": f"Failed to create variation type: {str(e)}"}, 500
 
+# Bootstrap Resource - everything the dashboard loads on startup
+class BootstrapResource(Resource):
+    @conditional_get('routines', 'variations', 'exercises', 'variation_types')
+    def get(self):
+        """Get all routines, exercises and variation types in one response
+        
+        Variations reference their exercise by exercise_id instead of
+        embedding it, so every exercise is loaded and sent once.
+        """
+        routines = Routine.query.options(selectinload(Routine.variations)).order_by(Routine.id).all()
+        exercises = Exercise.query.order_by(Exercise.id).all()
+        return {
+            "routines": serialize_all(routines, rules=('-variations.exercise',)),
+            "exercises": serialize_all(exercises, rules=('-variations',)),
+            "variation_types": variation_type_cache.all()
+        }, 200
+
+# Stats Resource - dashboard aggregates computed in SQL
+class StatsResource(Resource):
+    @conditional_get('routines', 'variations', 'exercises')
+    def get(self):
+        """Get counts by day, variation type, muscle group and equipment
+        
+        ?routine_id= and ?day_of_week= limit the counts to matching routines.
+        """
+        parser = reqparse.RequestParser()
+        parser.add_argument('routine_id', type=int, location='args')
+        parser.add_argument('day_of_week', type=str, location='args')
+        args = parser.parse_args()
+        
+        if args['routine_id'] is not None and not Routine.query.get(args['routine_id']):
+            return {"error": "Routine not found"}, 404
+        
+        return stats_cache.get(args['routine_id'], args['day_of_week']), 200
+
+# Changes Resource - delta sync from the change log
+class ChangesResource(Resource):
+    @conditional_get('changes', 'changes:horizon')
+    def get(self):
+        """Get the rows changed after ?since=, up to ?limit= change log entries
+        
+        A 410 means entries after since were compacted away; refetch the full
+        lists and continue from the seq it returns.
+        """
+        parser = reqparse.RequestParser()
+        parser.add_argument('since', type=int, location='args', default=0)
+        parser.add_argument('limit', type=int, location='args')
+        args = parser.parse_args()
+        
+        limit = args['limit'] if args['limit'] is not None else app.config['CHANGES_PAGE_SIZE']
+        max_limit = app.config['MAX_CHANGES_PAGE_SIZE']
+        if limit < 1 or limit > max_limit:
+            return {"error": f"limit must be between 1 and {max_limit}"}, 400
+        if args['since'] < 0:
+            return {"error": "since must not be negative"}, 400
+        
+        changes = get_changes(args['since'], limit)
+        if changes is None:
+            # Read before the client refetches, so nothing after it is missed
+            seq = get_versions([SEQ_KEY])[SEQ_KEY]
+            return {"error": "Changes since this point have been compacted; refetch everything", "seq": seq}, 410
+        return changes, 200
+
+# Events Resource - push change notifications instead of polling
+class EventsResource(Resource):
+    def get(self):
+        """Stream a change event for every commit, resuming after Last-Event-ID
+        
+        EventSource sends Last-Event-ID itself when it reconnects; the first
+        connection can pass the last seen seq as ?last_event_id= instead.
+        """
+        last_event_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+        if last_event_id is not None:
+            try:
+                last_event_id = int(last_event_id)
+            except ValueError:
+                return {"error": "Last-Event-ID must be an integer"}, 400
+        
+        return Response(
+            event_hub.stream(last_event_id),
+            mimetype='text/event-stream',
+            # Proxies must pass events through as they come
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
+# Export/Import Resources - stream the catalog as NDJSON
+class ExportResource(Resource):
+    def get(self, table=None):
+        """Stream exercises, routines and variations (or one of them) as NDJSON"""
+        if table is not None and table not in TABLES:
+            return {"error": f"Unknown table '{table}'"}, 404
+        
+        tables = [table] if table else list(TABLES)
+        return Response(stream_with_context(export_lines(tables)), mimetype='application/x-ndjson')
+
+class ImportResource(Resource):
+    def post(self):
+        """Import an NDJSON export, giving every row a new id"""
+        try:
+            counts = import_lines(request.stream)
+            return {"imported": counts}, 201
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        except Exception as e:
+            return {"error": "An error occurred while importing"}, 500
+
 # Register API routes
 api.add_resource(RoutineListResource, '/api/routines')
 api.add_resource(RoutineResource, '/api/routines/<int:routine_id>')
 api.add_resource(ExerciseListResource, '/api/exercises')
 api.add_resource(ExerciseResource, '/api/exercises/<int:exercise_id>')
+api.add_resource(ExerciseSuggestResource, '/api/exercises/suggest')
+api.add_resource(ExerciseSuggestStatsResource, '/api/exercises/suggest/stats')
 api.add_resource(VariationListResource, '/api/routines/<int:routine_id>/variations')
 api.add_resource(VariationResource, '/api/routines/<int:routine_id>/variations/<int:variation_id>')
+api.add_resource(VariationBatchResource, '/api/routines/<int:routine_id>/variations/batch')
 api.add_resource(VariationTypesResource, '/api/variation-types')
 api.add_resource(RoutineExercisesResource, '/api/routines/<int:routine_id>/exercises')
+api.add_resource(BootstrapResource, '/api/bootstrap')
+api.add_resource(StatsResource, '/api/stats')
+api.add_resource(ChangesResource, '/api/changes')
+api.add_resource(EventsResource, '/api/events')
+api.add_resource(ExportResource, '/api/export', '/api/export/<string:table>')
+api.add_resource(ImportResource, '/api/import')
 # For running the app directly
 if __name__ == '__main__':
     app.run(debug=True, port=5555)
\ No newline at end of file
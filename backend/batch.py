@@ -0,0 +1,126 @@
+from sqlalchemy import select
+
+from bulk import bulk_insert
+from changes import log_changes
+from models import db, Exercise, Variation
+from sqlite_profile import begin_write
+from variation_types import add_missing_types
+from versions import record_changes
+
+OPERATIONS = ('create', 'update', 'delete')
+
+
+def _is_id(value):
+    # JSON true and false are ints to Python
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def apply_variation_batch(routine_id, operations):
+    """Apply create, update and delete operations to a routine's variations
+
+    Every operation is checked before anything is written: exercise ids
+    and variation ids are each looked up with one IN query. If any
+    operation is invalid nothing is applied. Otherwise all of them are
+    flushed together, so the ORM can batch the INSERTs, UPDATEs and
+    DELETEs, and committed once.
+
+    Returns (results, ok) with one result per operation, in order.
+    """
+    begin_write(db.session)
+    exercise_ids = {
+        op.get('exercise_id') for op in operations
+        if isinstance(op, dict) and op.get('op') == 'create' and _is_id(op.get('exercise_id'))
+    }
+    variation_ids = {
+        op.get('id') for op in operations
+        if isinstance(op, dict) and op.get('op') in ('update', 'delete') and _is_id(op.get('id'))
+    }
+    exercise_names = dict(db.session.execute(
+        select(Exercise.id, Exercise.name).where(Exercise.id.in_(exercise_ids))
+    ).all()) if exercise_ids else {}
+    variations = {
+        variation.id: variation for variation in Variation.query.filter(
+            Variation.routine_id == routine_id, Variation.id.in_(variation_ids)
+        )
+    } if variation_ids else {}
+
+    results, created, touched = [], [], set()
+    for index, op in enumerate(operations):
+        result = {"index": index, "op": op.get('op') if isinstance(op, dict) else None}
+        results.append(result)
+        try:
+            if result['op'] not in OPERATIONS:
+                raise ValueError(f"op must be one of {', '.join(OPERATIONS)}")
+
+            if result['op'] == 'create':
+                exercise_id = op.get('exercise_id')
+                if not exercise_id:
+                    raise ValueError("Exercise ID is required")
+                if not _is_id(exercise_id):
+                    raise ValueError("Exercise ID must be an integer")
+                if exercise_id not in exercise_names:
+                    result.update(status=404, error="Exercise not found")
+                    continue
+                variation = Variation(
+                    exercise_id=exercise_id,
+                    routine_id=routine_id,
+                    name=op.get('name', f"{exercise_names[exercise_id]} Variation"),
+                    variation_type=op.get('variation_type', 'Standard')
+                )
+                created.append((result, variation))
+                result['status'] = 201
+                continue
+
+            variation_id = op.get('id')
+            if not variation_id:
+                raise ValueError("Variation ID is required")
+            if not _is_id(variation_id):
+                raise ValueError("Variation ID must be an integer")
+            if variation_id not in variations:
+                result.update(status=404, error="Variation not found in this routine")
+                continue
+            if variation_id in touched:
+                raise ValueError(f"Variation {variation_id} appears in more than one operation")
+            touched.add(variation_id)
+            result.update(status=200, id=variation_id)
+
+            variation = variations[variation_id]
+            if result['op'] == 'delete':
+                db.session.delete(variation)
+            else:
+                if 'name' in op:
+                    variation.name = op['name']
+                if 'variation_type' in op:
+                    variation.variation_type = op['variation_type']
+        except ValueError as e:
+            result.update(status=400, error=str(e))
+
+    if any(result['status'] >= 400 for result in results):
+        db.session.rollback()
+        return results, False
+
+    if created:
+        _insert_variations(routine_id, created)
+    db.session.commit()
+    return results, True
+
+
+def _insert_variations(routine_id, created):
+    """Insert validated (result, variation) pairs and record their new ids"""
+    rows = [
+        {
+            'exercise_id': variation.exercise_id,
+            'routine_id': variation.routine_id,
+            'name': variation.name,
+            'variation_type': variation.variation_type
+        }
+        for _, variation in created
+    ]
+    add_missing_types(db.session, {row['variation_type'] for row in rows})
+    db.session.flush()
+
+    new_ids = bulk_insert(db.session, Variation.__table__, rows)
+    for (result, _), variation_id in zip(created, new_ids):
+        result['id'] = variation_id
+    record_changes(db.session, {'variations'}, {routine_id}, {row['exercise_id'] for row in rows})
+    log_changes(db.session, (('variations', variation_id, False) for variation_id in new_ids))
@@ -0,0 +1,36 @@
+"""Helpers shared by the benchmark scripts
+
+Importing this puts the backend directory on sys.path, so the scripts
+can import the app when run as python benchmarks/<script>.py.
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def use_database(filename=None, **settings):
+    """Point the app at a throwaway database, with other config settings
+
+    Must run before the app is imported, since config.py reads the
+    environment then. The database is in memory unless a filename is
+    given, in which case it is a file in a new temporary directory, for
+    benchmarks whose threads need connections of their own. Returns that
+    directory, or None.
+    """
+    directory = None
+    if filename is None:
+        os.environ['DATABASE_URL'] = 'sqlite://'
+    else:
+        directory = tempfile.mkdtemp()
+        os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(directory, filename)}'
+    os.environ.update(settings)
+    return directory
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    index = max(int(round(fraction * len(samples) + 0.5)) - 1, 0)
+    return samples[min(index, len(samples) - 1)]
@@ -0,0 +1,170 @@
+"""Measure read throughput while writes are happening, with and without the SQLite profile
+
+Each profile runs against a fresh database file filled by seed.py's
+generator. Reader processes request the list and detail endpoints while
+writer processes create, update and delete variations, all through the
+test client, the way separate gunicorn workers share one database file. "default" is what SQLite and SQLAlchemy do
+without configuration (rollback journal, synchronous=FULL, a pool of 5);
+"tuned" is the profile from config.py.
+
+Reports reads and writes per second, read p50/p95 and the number of
+failed requests ("database is locked" and friends). The run fails if the
+tuned profile has any failures.
+
+Usage (from the backend directory):
+    python benchmarks/concurrency.py [--readers 8] [--writers 2] [--seconds 10]
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from _common import percentile
+
+PROFILES = {
+    'default': {
+        'SQLITE_JOURNAL_MODE': 'delete',
+        'SQLITE_SYNCHRONOUS': 'full',
+        'SQLITE_MMAP_SIZE': '0',
+        'SQLITE_CACHE_SIZE': '-2000',
+        'SQLITE_BUSY_TIMEOUT': '5000',
+        'SQLITE_FOREIGN_KEYS': 'false',
+        'DB_POOL_SIZE': '5',
+        'DB_MAX_OVERFLOW': '10',
+    },
+    'tuned': {},
+}
+
+DATASET = {'exercises': 1000, 'routines': 1000, 'variations_per_routine': 5}
+
+READS = [
+    '/api/routines?limit=50',
+    '/api/routines/{routine_id}',
+    '/api/routines/{routine_id}/variations',
+    '/api/exercises?limit=50',
+    '/api/exercises/{exercise_id}',
+]
+
+
+def reader(app, n, seconds, results):
+    client = app.test_client()
+    read_times, failures = [], 0
+    i = n
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        i += 1
+        path = READS[i % len(READS)].format(routine_id=i % DATASET['routines'] + 1,
+                                            exercise_id=i % DATASET['exercises'] + 1)
+        start = time.perf_counter()
+        response = client.get(path)
+        if response.status_code >= 400:
+            failures += report_failure(response, failures)
+            continue
+        read_times.append(time.perf_counter() - start)
+    results.put({'read_times': read_times, 'writes': 0, 'failures': failures})
+
+
+def writer(app, n, seconds, results):
+    client = app.test_client()
+    routine_id = n + 1
+    writes, failures = 0, 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        response = client.post(f'/api/routines/{routine_id}/variations',
+                               json={'exercise_id': n + 1, 'name': f'Concurrent {n}'})
+        if response.status_code != 201:
+            failures += report_failure(response, failures)
+            continue
+        writes += 1
+        path = f'/api/routines/{routine_id}/variations/{response.get_json()["id"]}'
+        for response in (client.put(path, json={'name': f'Concurrent {n} (renamed)'}), client.delete(path)):
+            if response.status_code >= 400:
+                failures += report_failure(response, failures)
+            else:
+                writes += 1
+    results.put({'read_times': [], 'writes': writes, 'failures': failures})
+
+
+def report_failure(response, failures):
+    if failures < 3:
+        print(f'{response.status_code} {response.get_data(as_text=True)[:120]}', file=sys.stderr)
+    return 1
+
+
+def run_profile(args):
+    """Run one profile's readers and writers as worker processes and return the results"""
+    from app import app, db
+    from seed import generate_database
+
+    with app.app_context():
+        db.create_all()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        generate_database(seed=42, **DATASET)
+    with app.app_context():
+        # Forked workers must open their own connections
+        db.engine.dispose()
+
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    workers = [context.Process(target=reader, args=(app, n, args.seconds, results)) for n in range(args.readers)]
+    workers += [context.Process(target=writer, args=(app, n, args.seconds, results)) for n in range(args.writers)]
+    for worker in workers:
+        worker.start()
+    totals = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    read_times = sorted(t for total in totals for t in total['read_times'])
+    return {
+        'reads_per_second': round(len(read_times) / args.seconds, 1),
+        'read_p50_ms': round(percentile(read_times, 0.50) * 1000, 2) if read_times else None,
+        'read_p95_ms': round(percentile(read_times, 0.95) * 1000, 2) if read_times else None,
+        'writes_per_second': round(sum(total['writes'] for total in totals) / args.seconds, 1),
+        'failures': sum(total['failures'] for total in totals),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--profile', choices=PROFILES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        print(json.dumps(run_profile(args)))
+        return 0
+
+    results = {}
+    for profile, overrides in PROFILES.items():
+        db_dir = tempfile.mkdtemp()
+        env = dict(os.environ, CACHE_TTL='0', SLOW_REQUEST_MS='0', SLOW_REQUEST_QUERIES='0',
+                   DATABASE_URL=f'sqlite:///{os.path.join(db_dir, "concurrency.db")}', **overrides)
+        output = subprocess.run(
+            [sys.executable, __file__, '--profile', profile, '--readers', str(args.readers),
+             '--writers', str(args.writers), '--seconds', str(args.seconds)],
+            env=env, stdout=subprocess.PIPE, text=True, check=True
+        ).stdout
+        results[profile] = json.loads(output.splitlines()[-1])
+
+    print(f'{args.readers} readers, {args.writers} writers, {args.seconds:g}s, {DATASET}')
+    print(f'  {"profile":<10} {"reads/s":>9} {"read p50":>10} {"read p95":>10} {"writes/s":>9} {"failed":>7}')
+    for profile, stats in results.items():
+        print(f'  {profile:<10} {stats["reads_per_second"]:>9} {stats["read_p50_ms"]:>8}ms '
+              f'{stats["read_p95_ms"]:>8}ms {stats["writes_per_second"]:>9} {stats["failures"]:>7}')
+
+    if results['tuned']['failures']:
+        print(f'FAIL: {results["tuned"]["failures"]} requests failed with the tuned profile')
+        return 1
+    print('OK')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
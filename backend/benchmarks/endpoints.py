@@ -0,0 +1,266 @@
+"""Benchmark every API resource against generated datasets of several sizes
+
+For each dataset size the database is filled with seed.py's generator and
+every endpoint is requested repeatedly through the test client. Reports
+p50/p95/p99 latency, throughput, SQL statements and response bytes per
+endpoint, and writes them as JSON so runs can be compared.
+
+The run fails if an endpoint goes over its limits in
+endpoint_thresholds.json, or, with --baseline, if its p95 grows by more
+than --tolerance over an earlier results file or it runs more statements.
+Writes are limited on p50: a few hundred cycles still leave p95 at the
+mercy of one slow commit or garbage collection.
+The response cache is off unless --cache is given, so every request
+reaches the database.
+
+Usage (from the backend directory):
+    python benchmarks/endpoints.py [--sizes small medium] [--write-cycles 200]
+                                   [--output results.json] [--baseline old.json] [--tolerance 0.25]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from _common import percentile, use_database
+
+if '--cache' in sys.argv:
+    use_database()
+else:
+    use_database(CACHE_TTL='0')
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+from sqlalchemy import event, func, select
+
+from app import app, db
+from changes import HORIZON_KEY
+from models import Variation
+from seed import generate_database
+from versions import get_versions
+
+SIZES = {
+    'small': {'exercises': 100, 'routines': 100, 'variations_per_routine': 5},
+    'medium': {'exercises': 1000, 'routines': 1000, 'variations_per_routine': 10},
+    'large': {'exercises': 5000, 'routines': 10000, 'variations_per_routine': 10},
+}
+
+# Read endpoints; ids are filled in once the dataset exists
+READS = [
+    '/api/routines',
+    '/api/routines?limit=50',
+    '/api/routines?fields=name,day_of_week&include=variations',
+    '/api/routines/{routine_id}',
+    '/api/routines/{routine_id}/variations',
+    '/api/routines/{routine_id}/variations/{variation_id}',
+    '/api/routines/{routine_id}/exercises',
+    '/api/exercises',
+    '/api/exercises?limit=50',
+    '/api/exercises?muscle_group=Chest&limit=50',
+    '/api/exercises?search=bench&limit=20',
+    '/api/exercises/{exercise_id}',
+    '/api/exercises/suggest?q=bnch',
+    '/api/variation-types',
+    '/api/bootstrap',
+    '/api/stats',
+    '/api/stats?routine_id={routine_id}',
+]
+
+# Writes run in cycles, each group in order; {new_id} is the row created by
+# the group's POST. Routine updates go to a routine that has variations.
+WRITES = [
+    [
+        ('POST', '/api/routines/{routine_id}/variations'),
+        ('PUT', '/api/routines/{routine_id}/variations/{new_id}'),
+        ('DELETE', '/api/routines/{routine_id}/variations/{new_id}'),
+    ],
+    [
+        ('POST', '/api/routines'),
+        ('PUT', '/api/routines/{routine_id}'),
+        ('DELETE', '/api/routines/{new_id}'),
+    ],
+    [('POST', '/api/exercises')],
+    [('POST', '/api/variation-types')],
+]
+
+# Read after the writes, so the change log has entries to return
+LOG_READS = [
+    '/api/changes?since={changes_since}',
+]
+
+THRESHOLDS_PATH = os.path.join(BENCHMARKS_DIR, 'endpoint_thresholds.json')
+
+# p95 changes smaller than this are treated as noise when comparing runs
+MIN_REGRESSION_MS = 5
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def summarize(timings, statements, sizes):
+    timings = sorted(timings)
+    total = sum(timings)
+    return {
+        'requests': len(timings),
+        'p50_ms': round(percentile(timings, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 3),
+        'throughput_rps': round(len(timings) / total, 1) if total else None,
+        'statements': max(statements),
+        'bytes': max(sizes),
+    }
+
+
+def send(client, counter, method, path, body=None):
+    counter.count = 0
+    db.session.remove()
+    start = time.perf_counter()
+    response = client.open(path, method=method, json=body)
+    elapsed = time.perf_counter() - start
+    assert response.status_code < 400, (method, path, response.status_code, response.get_data(as_text=True)[:200])
+    return response, elapsed, counter.count
+
+
+def request_body(method, template, label):
+    if method == 'POST' and template.endswith('/variations'):
+        return {'exercise_id': 1, 'name': label}
+    if method == 'POST' and template == '/api/routines':
+        return {'name': label, 'day_of_week': 'Monday'}
+    if method == 'POST':
+        return {'name': label}
+    if method == 'PUT':
+        return {'name': f'{label} (renamed)'}
+    return None
+
+
+def bench_reads(client, counter, ids, templates, max_requests, time_budget):
+    results = {}
+    for template in templates:
+        path = template.format(**ids)
+        timings, statements, sizes = [], [], []
+        started = time.perf_counter()
+        # At least five samples, then stop early on slow endpoints
+        while len(timings) < max_requests and (len(timings) < 5 or time.perf_counter() - started < time_budget):
+            response, elapsed, count = send(client, counter, 'GET', path)
+            timings.append(elapsed)
+            statements.append(count)
+            sizes.append(len(response.get_data()))
+        results[f'GET {template}'] = summarize(timings, statements, sizes)
+    return results
+
+
+def bench_writes(client, counter, ids, cycles, size):
+    samples = {f'{method} {template}': ([], [], []) for group in WRITES for method, template in group}
+    for i in range(cycles):
+        for group in WRITES:
+            new_id = None
+            for method, template in group:
+                path = template.format(new_id=new_id, **ids)
+                # Names are unique per size, since variation types are kept across sizes
+                body = request_body(method, template, f'Benchmark {size} {i}')
+                response, elapsed, count = send(client, counter, method, path, body)
+                if method == 'POST':
+                    new_id = response.get_json()['id']
+                timings, statements, sizes = samples[f'{method} {template}']
+                timings.append(elapsed)
+                statements.append(count)
+                sizes.append(len(response.get_data()))
+    return {key: summarize(*values) for key, values in samples.items()}
+
+
+def check_thresholds(results, thresholds):
+    failures = []
+    for size, endpoints in results.items():
+        for endpoint, stats in endpoints.items():
+            limits = thresholds.get(size, {}).get(endpoint, {})
+            for metric, limit in limits.items():
+                if stats[metric] > limit:
+                    failures.append(f'{size} {endpoint}: {metric} {stats[metric]} is over the limit of {limit}')
+    return failures
+
+
+def check_baseline(results, baseline, tolerance):
+    failures = []
+    for size, endpoints in results.items():
+        for endpoint, stats in endpoints.items():
+            before = baseline.get(size, {}).get(endpoint)
+            if before is None:
+                continue
+            growth = stats['p95_ms'] - before['p95_ms']
+            if growth > before['p95_ms'] * tolerance and growth > MIN_REGRESSION_MS:
+                failures.append(f'{size} {endpoint}: p95 went from {before["p95_ms"]}ms to {stats["p95_ms"]}ms')
+            if stats['statements'] > before['statements']:
+                failures.append(f'{size} {endpoint}: statements went from {before["statements"]} to {stats["statements"]}')
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', choices=SIZES, default=['small', 'medium'])
+    parser.add_argument('--requests', type=int, default=50, help='most requests per read endpoint')
+    parser.add_argument('--time-budget', type=float, default=3.0, help='seconds per read endpoint before stopping early')
+    parser.add_argument('--write-cycles', type=int, default=200)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='earlier results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p95 growth over the baseline')
+    parser.add_argument('--cache', action='store_true', help='leave the response cache on')
+    args = parser.parse_args()
+
+    results = {}
+    with app.app_context():
+        db.create_all()
+        counter = StatementCounter()
+        event.listen(db.engine, 'before_cursor_execute', counter)
+        client = app.test_client()
+
+        for size in args.sizes:
+            # The requests ran in this app context; end their transaction
+            # on the one in-memory connection before reseeding
+            db.session.remove()
+            generate_database(seed=42, **SIZES[size])
+            routine_id = 1
+            ids = {
+                'routine_id': routine_id,
+                'exercise_id': 1,
+                'variation_id': db.session.execute(
+                    select(func.min(Variation.id)).where(Variation.routine_id == routine_id)
+                ).scalar(),
+                # Generating the data resets the change log
+                'changes_since': get_versions([HORIZON_KEY])[HORIZON_KEY],
+            }
+
+            print(f'\n{size}: {SIZES[size]}')
+            print(f'  {"endpoint":<70} {"p50":>8} {"p95":>8} {"p99":>8} {"req/s":>8} {"sql":>4} {"bytes":>10}')
+            results[size] = bench_reads(client, counter, ids, READS, args.requests, args.time_budget)
+            results[size].update(bench_writes(client, counter, ids, args.write_cycles, size))
+            results[size].update(bench_reads(client, counter, ids, LOG_READS, args.requests, args.time_budget))
+            for endpoint, stats in results[size].items():
+                print(f'  {endpoint:<70} {stats["p50_ms"]:>7.2f}ms {stats["p95_ms"]:>6.2f}ms {stats["p99_ms"]:>6.2f}ms '
+                      f'{stats["throughput_rps"]:>8} {stats["statements"]:>4} {stats["bytes"]:>10}')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'\nResults written to {args.output}')
+
+    with open(THRESHOLDS_PATH) as f:
+        failures = check_thresholds(results, json.load(f))
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures += check_baseline(results, json.load(f), args.tolerance)
+
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    if failures:
+        return 1
+    print('OK')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
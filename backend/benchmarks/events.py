@@ -0,0 +1,223 @@
+"""Cost of idle /api/events streams and of pushing a change to all of them
+
+Opens --streams event streams and reports the memory each idle one holds.
+Then commits --writes routine updates and times how long each takes to
+reach every stream, against one round of the same number of clients
+polling /api/routines with If-None-Match, which is what the streams
+replace.
+
+By default the streams are suspended generators from the test client, so
+the numbers only cover the app's own share. With --server, the same runs
+against real connections to gunicorn gevent workers sharing a broker
+directory, and the memory is what the workers grew by.
+
+Usage (from the backend directory):
+    python benchmarks/events.py [--streams 5000] [--writes 20]
+    python benchmarks/events.py --server [--workers 4] [--streams 5000] [--writes 20]
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from _common import use_database
+
+# A file, since the hub's dispatcher thread needs its own connection
+DB_DIR = use_database('events.db')
+
+from app import app, db
+from seed import seed_database
+
+
+def current_rss_kb(pid='self'):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+def report(streams, per_stream_kb, fanout_ms, poll_ms):
+    print(f'{streams} idle streams: {per_stream_kb:.1f}KB each')
+    print(f'write reaching every stream: median {statistics.median(fanout_ms):.1f}ms, '
+          f'max {max(fanout_ms):.1f}ms (including the PUT)')
+    print(f'one round of {streams} polls answered 304: {poll_ms:.1f}ms')
+
+
+def run_in_process(args):
+    client = app.test_client()
+    # Warm up the hub's dispatcher and the write path
+    client.get('/api/events', buffered=False).close()
+    client.put('/api/routines/1', json={'name': 'Warm up'})
+
+    rss_before = current_rss_kb()
+    streams = []
+    for _ in range(args.streams):
+        response = client.get('/api/events', buffered=False)
+        chunks = iter(response.response)
+        next(chunks)  # retry: line
+        streams.append((response, chunks))
+    per_stream_kb = (current_rss_kb() - rss_before) / args.streams
+
+    fanout_ms = []
+    for i in range(args.writes):
+        start = time.perf_counter()
+        response = client.put('/api/routines/1', json={'name': f'Routine {i}'})
+        assert response.status_code == 200, response.status_code
+        for _, chunks in streams:
+            event = next(chunks)
+            while not event.startswith(b'id: '):  # Skip heartbeats
+                event = next(chunks)
+        fanout_ms.append((time.perf_counter() - start) * 1000)
+
+    etag = client.get('/api/routines').headers['ETag']
+    start = time.perf_counter()
+    for _ in range(args.streams):
+        response = client.get('/api/routines', headers={'If-None-Match': etag})
+        assert response.status_code == 304, response.status_code
+    poll_ms = (time.perf_counter() - start) * 1000
+
+    for response, _ in streams:
+        response.close()
+
+    report(args.streams, per_stream_kb, fanout_ms, poll_ms)
+    return 0
+
+
+async def http_request(port, method, path, headers=(), body=b''):
+    """Send one request on a new connection and return the status and body"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    lines = [f'{method} {path} HTTP/1.1', 'Host: localhost', 'Connection: close',
+             f'Content-Length: {len(body)}', *headers]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + body)
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), head, body
+
+
+class Stream:
+    """One real /api/events connection, counting the change events it receives"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.events = 0
+        self.received = asyncio.Event()
+
+    @classmethod
+    async def open(cls, port):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /api/events HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        # Wait for the retry: line, so the worker has subscribed
+        await reader.readuntil(b'retry: ')
+        return cls(reader, writer)
+
+    async def read(self):
+        while True:
+            data = await self.reader.read(65536)
+            if not data:
+                return
+            # Events start with their id line; heartbeats are comments
+            self.events += data.count(b'\nid: ')
+            self.received.set()
+
+    async def wait_for(self, count):
+        while self.events < count:
+            self.received.clear()
+            await self.received.wait()
+
+
+async def measure_server(args, port, worker_pids):
+    rss_before = sum(current_rss_kb(pid) for pid in worker_pids)
+    streams = []
+    # Connect in batches so the listen backlog doesn't overflow
+    for start in range(0, args.streams, 500):
+        streams += await asyncio.gather(*[Stream.open(port) for _ in range(start, min(start + 500, args.streams))])
+    readers = [asyncio.ensure_future(stream.read()) for stream in streams]
+    await asyncio.sleep(1)
+    per_stream_kb = (sum(current_rss_kb(pid) for pid in worker_pids) - rss_before) / args.streams
+
+    fanout_ms = []
+    for i in range(args.writes):
+        start = time.perf_counter()
+        status, _, _ = await http_request(port, 'PUT', '/api/routines/1', ['Content-Type: application/json'],
+                                          f'{{"name": "Routine {i}"}}'.encode())
+        assert status == 200, status
+        await asyncio.gather(*[stream.wait_for(i + 1) for stream in streams])
+        fanout_ms.append((time.perf_counter() - start) * 1000)
+
+    _, head, _ = await http_request(port, 'GET', '/api/routines')
+    etag = next(line.split(b':', 1)[1].strip().decode() for line in head.split(b'\r\n')
+                if line.lower().startswith(b'etag:'))
+    pending = asyncio.Semaphore(200)
+
+    async def poll():
+        async with pending:
+            status, _, _ = await http_request(port, 'GET', '/api/routines', [f'If-None-Match: {etag}'])
+            assert status == 304, status
+    start = time.perf_counter()
+    await asyncio.gather(*[poll() for _ in range(args.streams)])
+    poll_ms = (time.perf_counter() - start) * 1000
+
+    for stream in streams:
+        stream.writer.close()
+    for reader in readers:
+        reader.cancel()
+    return per_stream_kb, fanout_ms, poll_ms
+
+
+def run_server(args):
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    env = dict(os.environ, EVENTS_BROKER_DIR=os.path.join(DB_DIR, 'broker'))
+    server = subprocess.Popen(
+        ['gunicorn', '-k', 'gevent', '-w', str(args.workers), '--bind', f'127.0.0.1:{port}',
+         '--worker-connections', str(args.streams + 1000), 'app:app'],
+        env=env, stderr=subprocess.DEVNULL
+    )
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/api/variation-types')
+                break
+            except OSError:
+                time.sleep(0.1)
+        with open(f'/proc/{server.pid}/task/{server.pid}/children') as f:
+            worker_pids = [int(pid) for pid in f.read().split()]
+        # Let every worker load the app and warm up the write path
+        for _ in range(args.workers * 4):
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/routines').read()
+
+        report(args.streams, *asyncio.run(measure_server(args, port, worker_pids)))
+    finally:
+        server.send_signal(signal.SIGQUIT)
+        server.wait()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--streams', type=int, default=5000)
+    parser.add_argument('--writes', type=int, default=20)
+    parser.add_argument('--server', action='store_true', help='Run against gunicorn gevent workers')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        seed_database()
+    return run_server(args) if args.server else run_in_process(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""Compare write throughput with and without the group commit writer
+
+Each mode runs in its own process against a fresh database file. Writer
+threads, like the threads of one gunicorn worker, each add variations
+one POST at a time. "direct" commits every request on its own
+connection; "group" hands them to the writer thread (GROUP_COMMIT=true).
+Reports writes per second, p50/p95 latency, failed requests and, for
+group commit, the average number of writes per commit.
+
+Usage (from the backend directory):
+    python benchmarks/group_commit.py [--threads 16] [--seconds 10] [--synchronous full]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from _common import percentile
+
+MODES = {
+    'direct': {'GROUP_COMMIT': 'false'},
+    'group': {'GROUP_COMMIT': 'true'},
+}
+
+EXERCISES = 50
+ROUTINES = 20
+
+
+def run_mode(args):
+    """Run one mode in this process and return its results"""
+    from app import app, db
+    from group_commit import group_commit
+    from models import Exercise, Routine
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(Exercise(name=f'Exercise {i}', muscle_group='Chest') for i in range(EXERCISES))
+        db.session.add_all(Routine(name=f'Routine {i}', day_of_week='Monday') for i in range(ROUTINES))
+        db.session.commit()
+
+    # Count commits by wrapping the writer's group commit
+    groups = [0]
+    commit_group = group_commit._commit_group
+
+    def counting_commit_group(group):
+        groups[0] += 1
+        commit_group(group)
+    group_commit._commit_group = counting_commit_group
+
+    lock = threading.Lock()
+    timings, failures = [], [0]
+    deadline = time.perf_counter() + args.seconds
+
+    def writer(n):
+        client = app.test_client()
+        i = 0
+        while time.perf_counter() < deadline:
+            i += 1
+            start = time.perf_counter()
+            response = client.post(f'/api/routines/{n % ROUTINES + 1}/variations',
+                                   json={'exercise_id': i % EXERCISES + 1, 'name': f'Variation {n}-{i}'})
+            elapsed = time.perf_counter() - start
+            with lock:
+                if response.status_code == 201:
+                    timings.append(elapsed)
+                else:
+                    failures[0] += 1
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    timings.sort()
+    return {
+        'writes_per_second': round(len(timings) / elapsed, 1),
+        'p50_ms': round(percentile(timings, 0.50) * 1000, 2) if timings else None,
+        'p95_ms': round(percentile(timings, 0.95) * 1000, 2) if timings else None,
+        'failures': failures[0],
+        'writes_per_commit': round(len(timings) / groups[0], 1) if groups[0] else 1,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--synchronous', default='full', help='SQLite synchronous setting for both modes')
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args)))
+        return 0
+
+    results = {}
+    for mode, overrides in MODES.items():
+        db_dir = tempfile.mkdtemp()
+        env = dict(os.environ, CACHE_TTL='0', SLOW_REQUEST_MS='0', SLOW_REQUEST_QUERIES='0',
+                   SQLITE_SYNCHRONOUS=args.synchronous, DB_POOL_SIZE=str(args.threads + 1),
+                   DATABASE_URL=f'sqlite:///{os.path.join(db_dir, "group_commit.db")}', **overrides)
+        output = subprocess.run(
+            [sys.executable, __file__, '--mode', mode, '--threads', str(args.threads),
+             '--seconds', str(args.seconds)],
+            env=env, stdout=subprocess.PIPE, text=True, check=True
+        ).stdout
+        results[mode] = json.loads(output.splitlines()[-1])
+
+    print(f'{args.threads} threads, {args.seconds:g}s, synchronous={args.synchronous}')
+    print(f'  {"mode":<8} {"writes/s":>9} {"p50":>10} {"p95":>10} {"failed":>7} {"per commit":>11}')
+    for mode, stats in results.items():
+        print(f'  {mode:<8} {stats["writes_per_second"]:>9} {stats["p50_ms"]:>8}ms {stats["p95_ms"]:>8}ms '
+              f'{stats["failures"]:>7} {stats["writes_per_commit"]:>11}')
+
+    if results['group']['failures']:
+        print(f'FAIL: {results["group"]["failures"]} writes failed with group commit')
+        return 1
+    print('OK')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Compare encoding large list responses with orjson and the stdlib json module
+
+Fills an in-memory database with seed.py's generator, fetches the
+routine and exercise lists once, then times how long each encoder takes
+to turn those payloads into a response body, the way the Api's
+application/json representation does. Checks that both bodies decode to
+the same data.
+
+Usage (from the backend directory):
+    python benchmarks/json_encoding.py [--routines 2000] [--exercises 2000]
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+from _common import use_database
+
+use_database(CACHE_TTL='0', SLOW_REQUEST_MS='0', SLOW_REQUEST_QUERIES='0')
+
+from app import app, db
+from representations import dumps_orjson, dumps_stdlib, orjson
+from seed import generate_database
+
+PAYLOADS = [
+    '/api/routines',
+    '/api/routines?limit=500',
+    '/api/exercises',
+    '/api/exercises?fields=name,muscle_group,equipment',
+]
+REPEAT = 5
+
+
+def best_of(func):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--routines', type=int, default=2000)
+    parser.add_argument('--exercises', type=int, default=2000)
+    parser.add_argument('--variations-per-routine', type=int, default=5)
+    args = parser.parse_args()
+
+    if orjson is None:
+        print('FAIL: orjson is not installed')
+        return 1
+
+    with app.app_context():
+        db.create_all()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        generate_database(args.exercises, args.routines, args.variations_per_routine)
+
+    client = app.test_client()
+    ok = True
+    print(f'{"payload":<52} {"stdlib":>9} {"orjson":>9} {"speedup":>8} {"stdlib bytes":>13} {"orjson bytes":>13}')
+    with app.app_context():
+        for path in PAYLOADS:
+            data = client.get(path).get_json()
+            stdlib_time, stdlib_body = best_of(lambda: dumps_stdlib(data, {}))
+            orjson_time, orjson_body = best_of(lambda: dumps_orjson(data, {}))
+            if json.loads(stdlib_body) != json.loads(orjson_body):
+                print(f'FAIL: {path} encodes differently')
+                ok = False
+                continue
+            print(f'{path:<52} {stdlib_time * 1000:7.1f}ms {orjson_time * 1000:7.1f}ms '
+                  f'{stdlib_time / orjson_time:7.1f}x {len(stdlib_body.encode()):>13} {len(orjson_body):>13}')
+
+    if not ok:
+        return 1
+    print('OK')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
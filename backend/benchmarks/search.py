@@ -0,0 +1,83 @@
+"""Compare FTS5 exercise search with the old name ILIKE scan
+
+Loads 100k generated exercises into an in-memory database and times both
+search paths for a few terms, for the top 20 results and for every match.
+ILIKE only looks at names, so it finds fewer rows for some terms.
+
+Usage (from the backend directory):
+    python benchmarks/search.py [exercises]
+"""
+import random
+import sys
+import time
+
+from _common import use_database
+
+use_database()
+
+from app import app, db
+from models import Exercise
+from search import search_exercises
+
+EXERCISES = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+TERMS = ['bench', 'curl', 'incline press', 'barb', 'hamstring']
+LIMIT = 20
+REPEAT = 5
+
+PREFIXES = ['Incline', 'Decline', 'Seated', 'Standing', 'Single Arm', 'Paused', 'Tempo', 'Wide']
+MOVES = ['Bench Press', 'Curl', 'Row', 'Squat', 'Deadlift', 'Lunge', 'Fly', 'Pulldown', 'Raise']
+MUSCLES = ['Chest', 'Back', 'Legs', 'Arms', 'Shoulders', 'Core', 'Hamstrings', 'Glutes']
+EQUIPMENT = ['Barbell', 'Dumbbells', 'Cable Machine', 'Machine', 'Kettlebell', 'None']
+
+
+def seed():
+    db.create_all()
+    rng = random.Random(42)
+    rows = []
+    for i in range(EXERCISES):
+        move = rng.choice(MOVES)
+        muscle = rng.choice(MUSCLES)
+        rows.append({
+            'name': f'{rng.choice(PREFIXES)} {move} {i}',
+            'description': f'A {move.lower()} variation that works the {muscle.lower()}',
+            'muscle_group': muscle,
+            'equipment': rng.choice(EQUIPMENT),
+        })
+    db.session.execute(Exercise.__table__.insert(), rows)
+    db.session.commit()
+
+
+def time_query(build, limit=None):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        query = build()
+        if limit is not None:
+            query = query.limit(limit)
+        count = len(query.all())
+        db.session.expunge_all()
+    return (time.perf_counter() - start) / REPEAT, count
+
+
+def main():
+    with app.app_context():
+        print(f'Seeding {EXERCISES} exercises...')
+        seed()
+
+        for limit in (LIMIT, None):
+            print(f'\n{"top " + str(limit) if limit else "all matches"}:')
+            for term in TERMS:
+                ilike_time, ilike_count = time_query(
+                    lambda: Exercise.query.filter(Exercise.name.ilike(f'%{term}%')).order_by(Exercise.id),
+                    limit
+                )
+                fts_time, fts_count = time_query(
+                    lambda: search_exercises(Exercise.query, term).order_by(Exercise.id),
+                    limit
+                )
+                print(f'  {term!r:<16} ilike={ilike_time * 1000:8.2f}ms ({ilike_count:>5} rows)  '
+                      f'fts={fts_time * 1000:8.2f}ms ({fts_count:>5} rows)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Compare serializers.serialize() with SerializerMixin.to_dict()
+
+Seeds an in-memory database with 10k variations, checks that both paths
+produce the same JSON and times each of them.
+
+Usage (from the backend directory):
+    python benchmarks/serializer.py [rows]
+"""
+import json
+import sys
+import time
+
+from _common import use_database
+
+use_database()
+
+from sqlalchemy.orm import joinedload
+
+from app import app, db
+from models import Exercise, Routine, Variation
+from serializers import serialize_all
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+VARIATIONS_PER_ROUTINE = 5
+REPEAT = 3
+
+
+def seed():
+    db.create_all()
+    routine_count = ROWS // VARIATIONS_PER_ROUTINE
+    exercises = [
+        Exercise(name=f'Exercise {i}', description='Benchmark exercise',
+                 muscle_group='Chest', equipment='Barbell')
+        for i in range(routine_count)
+    ]
+    routines = [
+        Routine(name=f'Routine {i}', day_of_week='Monday', description='Benchmark routine')
+        for i in range(routine_count)
+    ]
+    db.session.add_all(exercises + routines)
+    db.session.flush()
+
+    db.session.add_all(
+        Variation(exercise_id=exercises[(i + j) % routine_count].id, routine_id=routine.id,
+                  name=f'Variation {j}', variation_type='Standard')
+        for i, routine in enumerate(routines)
+        for j in range(VARIATIONS_PER_ROUTINE)
+    )
+    db.session.commit()
+
+
+def best_of(func):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def compare(label, rows):
+    legacy_time, legacy = best_of(lambda: [row.to_dict() for row in rows])
+    fast_time, fast = best_of(lambda: serialize_all(rows))
+
+    if json.dumps(legacy, sort_keys=True) != json.dumps(fast, sort_keys=True):
+        print(f'FAIL: {label} output differs from to_dict()')
+        return False
+
+    print(f'{label:<34} to_dict={legacy_time * 1000:8.1f}ms  '
+          f'serialize={fast_time * 1000:8.1f}ms  speedup={legacy_time / fast_time:5.1f}x')
+    return True
+
+
+def main():
+    with app.app_context():
+        seed()
+
+        # Load everything up front so only serialization is timed
+        variations = Variation.query.options(
+            joinedload(Variation.exercise), joinedload(Variation.routine)
+        ).all()
+        routines = Routine.query.options(
+            joinedload(Routine.variations).joinedload(Variation.exercise)
+        ).all()
+
+        ok = compare(f'{len(variations)} variations', variations)
+        ok = compare(f'{len(routines)} routines (nested)', routines) and ok
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Response size and latency of /api/stats as the dataset grows
+
+Fills a fresh temporary database file with seed.py's generator for each
+size, then fetches the stats once cold (the aggregates are computed)
+and repeatedly warm (served from the cache until a table changes).
+The filtered variants are cold on their first fetch too. The body size
+only depends on the number of distinct categories, not on the rows.
+
+Usage (from the backend directory):
+    python benchmarks/stats.py [--variations 10000 100000 1000000 2000000]
+"""
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PATHS = [
+    '/api/stats',
+    '/api/stats?day_of_week=Monday',
+    '/api/stats?routine_id=1',
+]
+WARM_REQUESTS = 50
+
+
+def fetch(client, path):
+    start = time.perf_counter()
+    response = client.get(path)
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200, response.status_code
+    return elapsed * 1000, len(response.get_data())
+
+
+def run(args, variations):
+    """Generate the dataset in this process and return the numbers per path"""
+    from app import app, db
+    from seed import generate_database
+
+    with app.app_context():
+        db.create_all()
+    routines = max(variations // args.variations_per_routine, 1)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        generate_database(args.exercises, routines, args.variations_per_routine)
+
+    client = app.test_client()
+    results = {}
+    for path in PATHS:
+        cold_ms, size = fetch(client, path)
+        warm = [fetch(client, path)[0] for _ in range(WARM_REQUESTS)]
+        results[path] = {
+            'cold_ms': round(cold_ms, 1),
+            'warm_ms': round(statistics.median(warm), 2),
+            'bytes': size,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--variations', type=int, nargs='+', default=[10000, 100000, 1000000, 2000000])
+    parser.add_argument('--variations-per-routine', type=int, default=10)
+    parser.add_argument('--exercises', type=int, default=1000)
+    parser.add_argument('--run', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run is not None:
+        print(json.dumps(run(args, args.run)))
+        return 0
+
+    print(f'{args.exercises} exercises, {args.variations_per_routine} variations per routine')
+    print(f'  {"variations":>10}  {"request":<32} {"cold":>10} {"warm":>9} {"bytes":>7}')
+    for variations in args.variations:
+        db_dir = tempfile.mkdtemp()
+        env = dict(os.environ, SLOW_REQUEST_MS='0', SLOW_REQUEST_QUERIES='0',
+                   DATABASE_URL=f'sqlite:///{os.path.join(db_dir, "stats.db")}')
+        output = subprocess.run([sys.executable, __file__, '--run', str(variations),
+                                 '--variations-per-routine', str(args.variations_per_routine),
+                                 '--exercises', str(args.exercises)],
+                                env=env, stdout=subprocess.PIPE, text=True, check=True).stdout
+        results = json.loads(output.splitlines()[-1])
+        for path, stats in results.items():
+            print(f'  {variations:>10}  {path:<32} {stats["cold_ms"]:>8}ms {stats["warm_ms"]:>7}ms '
+                  f'{stats["bytes"]:>7}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
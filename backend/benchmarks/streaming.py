@@ -0,0 +1,122 @@
+"""Peak memory and time to first byte of the full lists, buffered and streamed
+
+Fills a temporary database file with seed.py's generator, then fetches
+each list once per process so every measurement starts from a fresh
+heap. Reports time to first byte, total time, body size and how much the
+process grew while serving the request (peak RSS over the RSS before
+it). The streamed variants also run with gzip, since streamed bodies are
+compressed chunk by chunk.
+
+Usage (from the backend directory):
+    python benchmarks/streaming.py [--routines 100000] [--exercises 100000]
+"""
+import argparse
+import contextlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REQUESTS = [
+    ('/api/routines', None),
+    ('/api/routines?stream=true', None),
+    ('/api/routines?stream=true', 'gzip'),
+    ('/api/exercises', None),
+    ('/api/exercises?stream=true', None),
+    ('/api/exercises?stream=true', 'gzip'),
+]
+
+
+def current_rss_kb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+def prepare(args):
+    from app import app, db
+    from seed import generate_database
+
+    with app.app_context():
+        db.create_all()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        generate_database(args.exercises, args.routines, args.variations_per_routine)
+
+
+def measure(path, encoding):
+    """Fetch path once in this process and return its numbers"""
+    from app import app
+
+    client = app.test_client()
+    # Warm up imports, the engine and the serializer plans on a small page
+    client.get(path.split('?')[0] + '?limit=1')
+    rss_before = current_rss_kb()
+
+    headers = {'Accept-Encoding': encoding} if encoding else {}
+    start = time.perf_counter()
+    response = client.get(path, headers=headers, buffered=False)
+    first_byte, size = None, 0
+    for chunk in response.response:
+        if chunk and first_byte is None:
+            first_byte = time.perf_counter() - start
+        size += len(chunk)
+    response.close()
+    total = time.perf_counter() - start
+    assert response.status_code == 200, response.status_code
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'ttfb_ms': round(first_byte * 1000, 1),
+        'total_ms': round(total * 1000, 1),
+        'bytes': size,
+        'peak_rss_mb': round(peak_kb / 1024, 1),
+        'growth_mb': round(max(peak_kb - rss_before, 0) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--routines', type=int, default=100000)
+    parser.add_argument('--exercises', type=int, default=100000)
+    parser.add_argument('--variations-per-routine', type=int, default=1)
+    parser.add_argument('--prepare', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--measure', nargs=2, metavar=('PATH', 'ENCODING'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.prepare:
+        prepare(args)
+        return 0
+    if args.measure:
+        path, encoding = args.measure
+        print(json.dumps(measure(path, encoding if encoding != '-' else None)))
+        return 0
+
+    db_dir = tempfile.mkdtemp()
+    env = dict(os.environ, CACHE_TTL='0', SLOW_REQUEST_MS='0', SLOW_REQUEST_QUERIES='0',
+               DATABASE_URL=f'sqlite:///{os.path.join(db_dir, "streaming.db")}')
+    subprocess.run([sys.executable, __file__, '--prepare', '--routines', str(args.routines),
+                    '--exercises', str(args.exercises),
+                    '--variations-per-routine', str(args.variations_per_routine)], env=env, check=True)
+
+    print(f'{args.routines} routines, {args.exercises} exercises, '
+          f'{args.routines * args.variations_per_routine} variations')
+    print(f'  {"request":<40} {"ttfb":>10} {"total":>10} {"bytes":>11} {"peak rss":>10} {"growth":>9}')
+    for path, encoding in REQUESTS:
+        output = subprocess.run([sys.executable, __file__, '--measure', path, encoding or '-'],
+                                env=env, stdout=subprocess.PIPE, text=True, check=True).stdout
+        stats = json.loads(output.splitlines()[-1])
+        label = f'{path} ({encoding})' if encoding else path
+        print(f'  {label:<40} {stats["ttfb_ms"]:>8}ms {stats["total_ms"]:>8}ms {stats["bytes"]:>11} '
+              f'{stats["peak_rss_mb"]:>8}MB {stats["growth_mb"]:>7}MB')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
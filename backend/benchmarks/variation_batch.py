@@ -0,0 +1,75 @@
+"""Compare adding variations one POST at a time with the batch endpoint
+
+Uses a temporary on-disk SQLite database so every commit pays for its
+fsync, the way it does in production. Each run adds the same number of
+variations to a fresh routine, then the batch run updates and deletes
+them too.
+
+Usage (from the backend directory):
+    python benchmarks/variation_batch.py [operations]
+"""
+import sys
+import time
+
+from _common import use_database
+
+use_database('batch.db')
+
+from app import app, db
+from models import Exercise, Routine
+
+OPERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+EXERCISES = 50
+
+
+def seed():
+    db.create_all()
+    db.session.add_all(Exercise(name=f'Exercise {i}', muscle_group='Chest') for i in range(EXERCISES))
+    db.session.add_all(Routine(name=f'Routine {i}', day_of_week='Monday') for i in range(2))
+    db.session.commit()
+
+
+def timed(label, send):
+    start = time.perf_counter()
+    response = send()
+    elapsed = time.perf_counter() - start
+    print(f'  {label:<34} {elapsed * 1000:9.1f}ms')
+    return response, elapsed
+
+
+def main():
+    with app.app_context():
+        seed()
+        client = app.test_client()
+        creates = [
+            {'op': 'create', 'exercise_id': i % EXERCISES + 1, 'name': f'Variation {i}'}
+            for i in range(OPERATIONS)
+        ]
+
+        print(f'{OPERATIONS} variations:')
+        timed('one POST per variation', lambda: [
+            client.post('/api/routines/1/variations', json=op) for op in creates
+        ])
+        response, create_time = timed('batch create', lambda: client.post(
+            '/api/routines/2/variations/batch', json=creates
+        ))
+        assert response.status_code == 200, response.get_json()
+
+        ids = [result['id'] for result in response.get_json()['results']]
+        half = len(ids) // 2
+        changes = [{'op': 'update', 'id': i, 'name': f'Renamed {i}'} for i in ids[:half]]
+        changes += [{'op': 'delete', 'id': i} for i in ids[half:]]
+        response, change_time = timed('batch update + delete', lambda: client.post(
+            '/api/routines/2/variations/batch', json=changes
+        ))
+        assert response.status_code == 200, response.get_json()
+
+    if max(create_time, change_time) >= 1:
+        print(f'FAIL: a batch of {OPERATIONS} operations took a second or more')
+        return 1
+    print('OK')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
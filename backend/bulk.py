@@ -0,0 +1,20 @@
+from sqlalchemy import insert
+
+
+def bulk_insert(session, table, rows):
+    """Insert rows with Core and return their new ids in the rows' order
+
+    sort_by_parameter_order makes SQLAlchemy match each RETURNING id to
+    its row. SQLite promises no order for a multi-row RETURNING, so the
+    rows go one statement each on a single cursor, without building ORM
+    objects. The ids come from the statements themselves, so rows other
+    connections insert at the same time can't be mistaken for these.
+
+    Core statements skip the flush hooks; callers record their changes
+    with versions.record_changes() and changes.log_changes().
+    """
+    if not rows:
+        return []
+    return session.execute(
+        insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
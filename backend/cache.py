@@ -0,0 +1,210 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import request
+
+from metrics import record_cache_lookup
+from versions import get_request_versions, on_commit
+
+
+class MemoryBackend:
+    """Bounded LRU cache with a TTL, local to one process"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (expires_at, namespace, value)
+        self._namespaces = {}  # namespace -> set of keys
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._remove(key)
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def set(self, key, value, ttl, namespace):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, namespace, value)
+            self._namespaces.setdefault(namespace, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, namespace):
+        with self._lock:
+            for key in list(self._namespaces.get(namespace, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._namespaces.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        _, namespace, _ = self._entries.pop(key)
+        keys = self._namespaces.get(namespace)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._namespaces[namespace]
+
+
+class RedisBackend:
+    """Cache shared by all workers through a Redis-compatible server
+
+    Values are stored as JSON with a TTL, and each namespace keeps a set of
+    its keys so it can be invalidated from any worker.
+    """
+
+    def __init__(self, url, prefix='workout-tracker:cache:'):
+        # Optional dependency, only needed when CACHE_BACKEND is "redis"
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    @property
+    def evictions(self):
+        return self.client.info('stats').get('evicted_keys', 0)
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl, namespace):
+        namespace_key = f'{self.prefix}namespace:{namespace}'
+        pipe = self.client.pipeline()
+        pipe.setex(self.prefix + key, ttl, json.dumps(value))
+        pipe.sadd(namespace_key, key)
+        pipe.expire(namespace_key, ttl)
+        pipe.execute()
+
+    def invalidate(self, namespace):
+        namespace_key = f'{self.prefix}namespace:{namespace}'
+        keys = self.client.smembers(namespace_key)
+        pipe = self.client.pipeline()
+        for key in keys:
+            pipe.delete(self.prefix + key.decode())
+        pipe.delete(namespace_key)
+        pipe.execute()
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+    def __len__(self):
+        return sum(1 for key in self.client.scan_iter(match=self.prefix + '*')
+                   if not key.decode().startswith(self.prefix + 'namespace:'))
+
+
+class ResponseCache:
+    """Cache of serialized GET responses, invalidated when their data is committed
+
+    Responses are grouped in namespaces such as "exercises" or
+    "exercises:3"; a commit invalidates exactly the namespaces whose data
+    it touched. Invalidation only reaches this process's memory backend,
+    so entries are also keyed on the versions of the tables they read: a
+    commit from any worker moves readers to a new key, and a body cached
+    from before a commit can't be served under the ETag from after it.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.ttl = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config['CACHE_TTL']
+        if app.config['CACHE_BACKEND'] == 'redis':
+            self.backend = RedisBackend(app.config['CACHE_REDIS_URL'])
+        else:
+            self.backend = MemoryBackend(app.config['CACHE_MAX_ENTRIES'])
+        on_commit(self._invalidate_changes)
+
+    @property
+    def enabled(self):
+        return self.backend is not None and self.ttl > 0
+
+    def stats(self):
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.backend.evictions
+        }
+
+    def invalidate(self, *namespaces):
+        for namespace in namespaces:
+            self.backend.invalidate(namespace)
+
+    def _invalidate_changes(self, changes):
+        # Entries of older versions are never read again; this just frees
+        # them early. Details of exercises only reached through a renamed
+        # routine are left to age out.
+        namespaces = [f'exercises:{exercise_id}' for exercise_id in changes['exercises']]
+        # The exercise list embeds every exercise's variations and routines
+        if changes['tables'] & {'exercises', 'variations', 'routines'}:
+            namespaces.append('exercises')
+        self.invalidate(*namespaces)
+
+    def cached(self, namespace, *keys):
+        """Cache a GET view's 200 responses under a namespace
+
+        The namespace may reference view arguments, e.g. 'exercises:{exercise_id}'.
+        Responses are keyed on the path, the sorted query arguments and the
+        current versions of keys, the version keys of the data the view reads.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return view(*args, **kwargs)
+
+                key = request.path
+                query = sorted(request.args.items(multi=True))
+                if query:
+                    key = f'{key}?{urlencode(query)}'
+                versions = get_request_versions([k.format(**kwargs) for k in keys])
+                key += ''.join(f'|{k}={version}' for k, version in versions.items())
+
+                data = self.backend.get(key)
+                record_cache_lookup('response', data is not None)
+                with self._lock:
+                    if data is not None:
+                        self.hits += 1
+                    else:
+                        self.misses += 1
+                if data is not None:
+                    return data, 200
+
+                result = view(*args, **kwargs)
+                if isinstance(result, tuple) and len(result) == 2 and result[1] == 200:
+                    self.backend.set(key, result[0], self.ttl, namespace.format(**kwargs))
+                return result
+            return wrapper
+        return decorator
+
+
+cache = ResponseCache()
@@ -0,0 +1,177 @@
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, event, func, select, update
+from sqlalchemy.orm import Session
+
+from models import db, Change, Exercise, Routine, Variation, VariationType, TableVersion
+from serializers import serialize_all
+from versions import get_versions
+
+# Tables whose rows are logged, and how their upserts are serialized
+MODELS = {
+    'routines': (Routine, ('-variations',)),
+    'exercises': (Exercise, ('-variations',)),
+    'variations': (Variation, ('-exercise', '-routine')),
+    'variation_types': (VariationType, ()),
+}
+TABLE_NAMES = {model: name for name, (model, _) in MODELS.items()}
+
+# Version keys holding the last sequence handed out, and the sequence up
+# to which entries may have been dropped by compaction or a reset
+SEQ_KEY = 'changes'
+HORIZON_KEY = 'changes:horizon'
+
+
+def _allocate(connection, count):
+    """Reserve count sequences and return the first
+
+    The counter row is updated inside the writing transaction, so it stays
+    locked until commit and sequences are handed out in commit order: a
+    reader that has seen seq n never finds a smaller one committed later.
+    """
+    table = TableVersion.__table__
+    last = connection.execute(
+        update(table).where(table.c.key == SEQ_KEY)
+        .values(version=table.c.version + count).returning(table.c.version)
+    ).scalar()
+    if last is None:
+        last = count
+        connection.execute(table.insert(), [{'key': SEQ_KEY, 'version': last}])
+    return last - count + 1
+
+
+def _set_horizon(connection, seq):
+    table = TableVersion.__table__
+    updated = connection.execute(
+        update(table).where(table.c.key == HORIZON_KEY).values(version=seq)
+    ).rowcount
+    if not updated:
+        connection.execute(table.insert(), [{'key': HORIZON_KEY, 'version': seq}])
+
+
+def log_changes(session, entries):
+    """Append (table name, row id, deleted) entries to the change log
+
+    The after_flush hook below logs ORM writes. Bulk loaders that insert
+    with Core (imports and variation batches) pass their new ids here
+    themselves.
+    """
+    entries = list(entries)
+    if not entries:
+        return
+    connection = session.connection()
+    first = _allocate(connection, len(entries))
+    now = datetime.now(timezone.utc)
+    connection.execute(Change.__table__.insert(), [
+        {'seq': seq, 'table_name': table_name, 'row_id': row_id, 'deleted': deleted, 'created_at': now}
+        for seq, (table_name, row_id, deleted) in enumerate(entries, first)
+    ])
+
+
+@event.listens_for(Session, 'after_flush')
+def _log_flushed_rows(session, flush_context):
+    entries = []
+    for obj in session.new:
+        if type(obj) in TABLE_NAMES:
+            entries.append((TABLE_NAMES[type(obj)], obj.id, False))
+    for obj in session.dirty:
+        # Skip objects only touched through a relationship collection
+        if type(obj) in TABLE_NAMES and session.is_modified(obj, include_collections=False):
+            entries.append((TABLE_NAMES[type(obj)], obj.id, False))
+    for obj in session.deleted:
+        if type(obj) in TABLE_NAMES:
+            entries.append((TABLE_NAMES[type(obj)], obj.id, True))
+    log_changes(session, entries)
+
+
+def reset_changes(session):
+    """Drop the whole log after rows were replaced without being logged
+
+    Every client is behind the new horizon afterwards, so all of them
+    refetch the full lists once.
+    """
+    connection = session.connection()
+    connection.execute(delete(Change.__table__))
+    _set_horizon(connection, _allocate(connection, 1))
+
+
+def compact_changes(session, tombstone_age):
+    """Shrink the log and return the number of entries removed
+
+    Only the newest entry of each row is kept, which is all a client
+    needs since upserts carry the row's current values. Tombstones older
+    than tombstone_age (a timedelta) are dropped as well, and the horizon
+    moves past them so clients that could have missed one resync.
+    """
+    connection = session.connection()
+    table = Change.__table__
+    latest = select(func.max(table.c.seq)).group_by(table.c.table_name, table.c.row_id)
+    removed = connection.execute(delete(table).where(table.c.seq.not_in(latest))).rowcount
+
+    expired = table.c.deleted & (table.c.created_at < datetime.now(timezone.utc) - tombstone_age)
+    last_expired = connection.execute(select(func.max(table.c.seq)).where(expired)).scalar()
+    if last_expired is not None:
+        horizon = get_versions([HORIZON_KEY])[HORIZON_KEY]
+        _set_horizon(connection, max(horizon, last_expired))
+        removed += connection.execute(delete(table).where(expired)).rowcount
+    return removed
+
+
+def get_changes(since, limit):
+    """Get the rows changed after since, with the sequence to ask from next
+
+    Returns None if since is behind the horizon. Each row shows up once,
+    as an upsert with its current values or as the id of a tombstone.
+    """
+    versions = get_versions([SEQ_KEY, HORIZON_KEY])
+    if since < versions[HORIZON_KEY]:
+        return None
+
+    table = Change.__table__
+    entries = db.session.execute(
+        select(table.c.seq, table.c.table_name, table.c.row_id, table.c.deleted)
+        .where(table.c.seq > since).order_by(table.c.seq).limit(limit + 1)
+    ).all()
+    more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Later entries of a row override earlier ones
+    latest = {}
+    for entry in entries:
+        latest[entry.table_name, entry.row_id] = entry.deleted
+
+    upserts, tombstones = {}, {}
+    for name, (model, rules) in MODELS.items():
+        deleted = sorted(row_id for (table_name, row_id), is_deleted in latest.items()
+                         if table_name == name and is_deleted)
+        ids = sorted(row_id for (table_name, row_id), is_deleted in latest.items()
+                     if table_name == name and not is_deleted)
+        rows = model.query.filter(model.id.in_(ids)).order_by(model.id).all() if ids else []
+        # Rows deleted after their entry was read are tombstones too
+        found = {row.id for row in rows}
+        deleted = sorted(set(deleted) | (set(ids) - found))
+        upserts[name] = serialize_all(rows, rules=rules)
+        tombstones[name] = deleted
+
+    return {
+        "since": since,
+        "seq": entries[-1].seq if entries else max(since, versions[SEQ_KEY]),
+        "more": more,
+        "upserts": upserts,
+        "tombstones": tombstones
+    }
+
+
+@click.command('compact-changes')
+@click.option('--tombstone-days', type=int, help='Drop tombstones older than this, CHANGES_TOMBSTONE_DAYS by default')
+@with_appcontext
+def compact_changes_command(tombstone_days):
+    """Keep only the newest change of each row and drop old tombstones"""
+    if tombstone_days is None:
+        tombstone_days = current_app.config['CHANGES_TOMBSTONE_DAYS']
+    removed = compact_changes(db.session, timedelta(days=tombstone_days))
+    db.session.commit()
+    click.echo(f'{removed} changes removed', err=True)
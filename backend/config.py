@@ -9,6 +9,78 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///workout_tracker.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Connection pool for file databases; each thread of a worker holds at
+    # most one connection, so pool_size should cover the thread count
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+    
+    # SQLite PRAGMAs set on every connection (cache_size is in KiB when
+    # negative, busy_timeout in milliseconds)
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'wal')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'normal')
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', -64 * 1024))
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))
+    SQLITE_FOREIGN_KEYS = os.environ.get('SQLITE_FOREIGN_KEYS', 'true').lower() == 'true'
+    
+    # Pagination configuration (?limit= and ?after= on list endpoints)
+    PAGE_SIZE = int(os.environ.get('PAGE_SIZE', 50))
+    MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 500))
+    
+    # Run single-row writes on one writer thread per worker that commits
+    # up to GROUP_COMMIT_MAX_SIZE of them at once, waiting at most
+    # GROUP_COMMIT_WINDOW_MS for more after the first
+    GROUP_COMMIT = os.environ.get('GROUP_COMMIT', 'false').lower() == 'true'
+    GROUP_COMMIT_MAX_SIZE = int(os.environ.get('GROUP_COMMIT_MAX_SIZE', 100))
+    GROUP_COMMIT_WINDOW_MS = float(os.environ.get('GROUP_COMMIT_WINDOW_MS', 2))
+    
+    # Change log (/api/changes): entries per page, and how long compaction
+    # keeps the tombstones of deleted rows
+    CHANGES_PAGE_SIZE = int(os.environ.get('CHANGES_PAGE_SIZE', 1000))
+    MAX_CHANGES_PAGE_SIZE = int(os.environ.get('MAX_CHANGES_PAGE_SIZE', 10000))
+    CHANGES_TOMBSTONE_DAYS = int(os.environ.get('CHANGES_TOMBSTONE_DAYS', 30))
+    
+    # Server-Sent Events (/api/events): seconds between heartbeats, which is
+    # also how often a worker checks the change log for writes it wasn't
+    # woken for, and how many unsent events a slow client may queue before
+    # it is disconnected. Workers on one host wake each other through
+    # EVENTS_BROKER_DIR, an empty directory they all share.
+    EVENTS_HEARTBEAT_SECONDS = float(os.environ.get('EVENTS_HEARTBEAT_SECONDS', 15))
+    EVENTS_MAX_QUEUE = int(os.environ.get('EVENTS_MAX_QUEUE', 100))
+    EVENTS_BROKER_DIR = os.environ.get('EVENTS_BROKER_DIR')
+    
+    # Most operations accepted by one variation batch request
+    MAX_BATCH_OPERATIONS = int(os.environ.get('MAX_BATCH_OPERATIONS', 5000))
+    
+    # Response cache configuration ("memory" per process, or "redis" to share
+    # it across workers; redis needs the redis package from
+    # requirements-optional.txt). A TTL of 0 disables it.
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_TTL = int(os.environ.get('CACHE_TTL', 300))
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    
+    # Request instrumentation: a Server-Timing header with db, serialize and
+    # encode time, and a warning log with the slowest statements of requests
+    # over either budget (0 disables that budget; both are off by default)
+    SERVER_TIMING = os.environ.get('SERVER_TIMING', 'true').lower() == 'true'
+    SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 0))
+    SLOW_REQUEST_QUERIES = int(os.environ.get('SLOW_REQUEST_QUERIES', 0))
+    SLOW_REQUEST_STATEMENTS = int(os.environ.get('SLOW_REQUEST_STATEMENTS', 20))
+    
+    # Prometheus metrics at /metrics. With several workers, also set
+    # PROMETHEUS_MULTIPROC_DIR to an empty directory they all share.
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    
+    # Response compression: gzip, or brotli when the brotli package is
+    # installed, for clients that accept it and bodies of at least
+    # COMPRESS_MIN_SIZE bytes (streamed bodies are always compressed)
+    COMPRESSION = os.environ.get('COMPRESSION', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))
+    
     # Security configuration
     SECRET_KEY = os.environ.get('SECRET_KEY', 'your_very_secret_key_here')
     
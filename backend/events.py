@@ -0,0 +1,245 @@
+import glob
+import json
+import os
+import queue
+import socket
+import threading
+
+from sqlalchemy import select
+
+from changes import SEQ_KEY, HORIZON_KEY
+from models import db, Change
+from versions import get_versions, on_commit
+
+HEARTBEAT = b': heartbeat\n\n'
+
+
+def format_event(event, data, event_id=None):
+    """Encode one Server-Sent Event"""
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {event}', f'data: {json.dumps(data, separators=(",", ":"))}']
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+def read_entries(after, limit):
+    """Get up to limit change log entries after a sequence, oldest first"""
+    table = Change.__table__
+    return db.session.execute(
+        select(table.c.seq, table.c.table_name, table.c.row_id, table.c.deleted)
+        .where(table.c.seq > after).order_by(table.c.seq).limit(limit)
+    ).all()
+
+
+def change_event(entries):
+    """Encode entries as a change event whose id is the last entry's sequence"""
+    seq = entries[-1].seq
+    return format_event('change', {
+        "seq": seq,
+        "changes": [
+            {"table": entry.table_name, "id": entry.row_id, "deleted": entry.deleted}
+            for entry in entries
+        ]
+    }, seq)
+
+
+class LocalBroker:
+    """Wake the event hubs of every worker on this host
+
+    Each worker with open streams binds a Unix datagram socket in a shared
+    directory, and a commit sends an empty datagram to every socket there.
+    The message only says "read the change log"; the log itself carries the
+    events, so a lost or merged wake-up costs nothing but latency. A stand-in
+    for a real broker's pub/sub on a single host.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._sender = None
+        self._pid = None
+
+    def publish(self):
+        # Sockets don't survive a fork, so each worker makes its own
+        if self._pid != os.getpid():
+            self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sender.setblocking(False)
+            self._pid = os.getpid()
+        for address in glob.glob(os.path.join(self.path, '*.sock')):
+            try:
+                self._sender.sendto(b'', address)
+            except BlockingIOError:
+                pass  # That worker already has wake-ups waiting
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Left behind by a worker that is gone
+                try:
+                    os.unlink(address)
+                except FileNotFoundError:
+                    pass
+
+    def listen(self, callback):
+        """Call callback() on a daemon thread for every wake-up sent to this process"""
+        os.makedirs(self.path, exist_ok=True)
+        address = os.path.join(self.path, f'{os.getpid()}.sock')
+        if os.path.exists(address):
+            os.unlink(address)
+        receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        receiver.bind(address)
+
+        def receive():
+            while True:
+                receiver.recv(16)
+                callback()
+
+        threading.Thread(target=receive, name='event-broker', daemon=True).start()
+
+
+class _Subscription:
+    __slots__ = ('queue',)
+
+    def __init__(self):
+        # (seq, encoded event) pairs, None once the hub drops the subscription
+        self.queue = queue.Queue()
+
+
+class EventHub:
+    """Fan change log entries out to every open Server-Sent Events stream
+
+    One dispatcher thread per worker reads new change log entries when a
+    commit wakes it, encodes them once and queues the same bytes on every
+    stream. Idle streams only hold a queue and a suspended generator, so
+    the per-connection cost is whatever the server spends on a waiting
+    request; run gunicorn with a gevent worker to hold thousands of them.
+    Every EVENTS_HEARTBEAT_SECONDS the dispatcher also checks the log for
+    writes it wasn't woken for, e.g. by other workers when there is no
+    broker, and sends a heartbeat comment to every stream.
+
+    A stream that falls EVENTS_MAX_QUEUE events behind is closed; the
+    client reconnects with Last-Event-ID and catches up from the log.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.heartbeat = 15
+        self.max_queue = 100
+        self.page_size = 1000
+        self.broker = None
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._dispatcher = None
+        self._last_seq = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.heartbeat = app.config['EVENTS_HEARTBEAT_SECONDS']
+        self.max_queue = app.config['EVENTS_MAX_QUEUE']
+        self.page_size = app.config['CHANGES_PAGE_SIZE']
+        if app.config['EVENTS_BROKER_DIR']:
+            self.broker = LocalBroker(app.config['EVENTS_BROKER_DIR'])
+        on_commit(self._on_commit)
+
+    def _on_commit(self, changes):
+        if self.broker is not None:
+            self.broker.publish()
+        else:
+            self._wake.set()
+
+    def stream(self, last_event_id=None):
+        """Get an iterator of encoded events for one client
+
+        With a last_event_id, the entries after it are replayed from the
+        log first. If they were compacted away, or there are more than
+        fit in one page, the client gets a resync event telling it to
+        catch up with /api/changes?since=<last_event_id> instead.
+        """
+        subscription = self._subscribe()
+        first = [b'retry: 3000\n\n']
+        replayed = 0
+        if last_event_id is not None:
+            versions = get_versions([SEQ_KEY, HORIZON_KEY])
+            entries = [] if last_event_id < versions[HORIZON_KEY] else read_entries(last_event_id, self.page_size + 1)
+            if last_event_id < versions[HORIZON_KEY] or len(entries) > self.page_size:
+                first.append(format_event('resync', {"since": last_event_id}))
+            elif entries:
+                first.append(change_event(entries))
+                replayed = entries[-1].seq
+        return self._generate(subscription, first, replayed)
+
+    def _generate(self, subscription, first, replayed):
+        try:
+            yield b''.join(first)
+            while True:
+                item = subscription.queue.get()
+                if item is None:
+                    return
+                seq, message = item
+                # Live events the replay already covered
+                if seq is not None and seq <= replayed:
+                    continue
+                yield message
+        finally:
+            self._unsubscribe(subscription)
+
+    def _subscribe(self):
+        self._start()
+        subscription = _Subscription()
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _broadcast(self, seq, message):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if subscription.queue.qsize() >= self.max_queue:
+                self._unsubscribe(subscription)
+                subscription.queue.put(None)
+            else:
+                subscription.queue.put((seq, message))
+
+    def _start(self):
+        # Threads don't survive a fork, so under gunicorn's preload each
+        # worker starts its own dispatcher with its first stream
+        if self._dispatcher is not None and self._dispatcher.is_alive():
+            return
+        with self._lock:
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                self._last_seq = get_versions([SEQ_KEY])[SEQ_KEY]
+                if self.broker is not None:
+                    self.broker.listen(self._wake.set)
+                self._dispatcher = threading.Thread(target=self._dispatch_loop, name='event-hub', daemon=True)
+                self._dispatcher.start()
+
+    def _dispatch_loop(self):
+        with self.app.app_context():
+            while True:
+                woken = self._wake.wait(self.heartbeat)
+                self._wake.clear()
+                try:
+                    self._dispatch()
+                except Exception:
+                    self.app.logger.exception('Reading the change log for events failed')
+                finally:
+                    db.session.remove()
+                if not woken:
+                    self._broadcast(None, HEARTBEAT)
+
+    def _dispatch(self):
+        if get_versions([SEQ_KEY])[SEQ_KEY] <= self._last_seq:
+            return
+        while True:
+            entries = read_entries(self._last_seq, self.page_size)
+            if not entries:
+                return
+            self._last_seq = entries[-1].seq
+            self._broadcast(self._last_seq, change_event(entries))
+            if len(entries) < self.page_size:
+                return
+
+
+event_hub = EventHub()
@@ -0,0 +1,86 @@
+from sqlalchemy import inspect as sql_inspect
+from sqlalchemy.orm import joinedload, load_only, selectinload
+
+
+def add_fieldset_arguments(parser):
+    """Add the optional ?fields= and ?include= arguments"""
+    parser.add_argument('fields', type=str, location='args')
+    parser.add_argument('include', type=str, location='args')
+    return parser
+
+
+def _split(value):
+    return [part.strip() for part in (value or '').split(',') if part.strip()]
+
+
+def _column_keys(model):
+    return [column.key for column in sql_inspect(model).column_attrs]
+
+
+class Fieldset:
+    """A sparse fieldset requested with ?fields= and ?include=
+
+    fields picks the columns of the top-level model (the primary key is
+    always returned) and include lists the relationships to expand, as
+    dotted paths relative to that model. Anything not asked for is neither
+    loaded nor serialized.
+    """
+
+    def __init__(self, model, fields=None, include=None):
+        self.model = model
+        mapper = sql_inspect(model)
+        columns = _column_keys(model)
+
+        if fields:
+            unknown = [f for f in fields if f not in columns]
+            if unknown:
+                raise ValueError(f"Unknown field '{unknown[0]}' for {model.__tablename__}")
+            primary_keys = [column.key for column in mapper.primary_key]
+            self.fields = primary_keys + [f for f in fields if f not in primary_keys]
+        else:
+            self.fields = columns
+
+        # Every prefix of an included path is included as well
+        self.include = {}
+        for path in include or []:
+            current = mapper
+            keys = path.split('.')
+            for i, key in enumerate(keys):
+                relationship = current.relationships.get(key)
+                if relationship is None:
+                    raise ValueError(f"Unknown relation '{'.'.join(keys[:i + 1])}' for {model.__tablename__}")
+                current = relationship.mapper
+                self.include['.'.join(keys[:i + 1])] = relationship
+
+    @property
+    def only(self):
+        """Serializer rules that emit exactly the requested fields and relations"""
+        rules = list(self.fields)
+        for path, relationship in self.include.items():
+            rules.extend(f'{path}.{key}' for key in _column_keys(relationship.mapper.class_))
+        return tuple(rules)
+
+    def options(self):
+        """Loader options that fetch only the requested columns and relations"""
+        options = [load_only(*[getattr(self.model, f) for f in self.fields])]
+        for path in self.include:
+            loader, parent = None, self.model
+            for key in path.split('.'):
+                attr = getattr(parent, key)
+                if loader is None:
+                    loader = selectinload(attr) if attr.property.uselist else joinedload(attr)
+                else:
+                    loader = loader.selectinload(attr) if attr.property.uselist else loader.joinedload(attr)
+                parent = attr.property.mapper.class_
+            options.append(loader)
+        return options
+
+
+def parse_fieldset(model, args):
+    """Get the Fieldset for a request, or None if it asked for the default shape
+
+    Raises ValueError for unknown fields or relations.
+    """
+    if args['fields'] is None and args['include'] is None:
+        return None
+    return Fieldset(model, _split(args['fields']), _split(args['include']))
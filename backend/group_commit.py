@@ -0,0 +1,137 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from models import db
+from sqlite_profile import begin_write
+
+
+class _Job:
+    __slots__ = ('work', 'future')
+
+    def __init__(self, work):
+        self.work = work
+        self.future = Future()
+
+
+class GroupCommitQueue:
+    """Run writes on one writer thread that commits them in groups
+
+    With GROUP_COMMIT off, run() calls the work function and commits right
+    away. With it on, the work is queued and run() waits for its result.
+    The writer takes up to GROUP_COMMIT_MAX_SIZE queued writes, waiting at
+    most GROUP_COMMIT_WINDOW_MS for more after the first, runs each in its
+    own SAVEPOINT on the writer's session and commits them all at once. A
+    write that raises is rolled back alone and its caller gets the
+    exception; if the commit fails, every caller in the group does. No
+    caller gets a result before the commit holding its write returns, so
+    a response still means the change is durable.
+
+    Work functions use db.session and flush instead of committing, and
+    return plain values such as the ids they wrote: objects loaded in the
+    request's session belong to another session when they run on the
+    writer. Callers load and serialize the response after run() returns,
+    so the writer's transaction only holds the write itself.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self.max_size = 1
+        self.window = 0
+        self._queue = queue.Queue()
+        self._writer = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config['GROUP_COMMIT']
+        self.max_size = app.config['GROUP_COMMIT_MAX_SIZE']
+        self.window = app.config['GROUP_COMMIT_WINDOW_MS'] / 1000
+
+    def run(self, work):
+        """Run work() and commit it, returning its result or raising its exception"""
+        if not self.enabled:
+            begin_write(db.session)
+            try:
+                result = work()
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            return result
+        # Give the request's connection back while waiting, or requests
+        # queued behind the writer could hold every connection it needs
+        db.session.close()
+        return self.submit(work).result()
+
+    def submit(self, work):
+        """Queue work() for the writer thread and return a Future of its result"""
+        self._start()
+        job = _Job(work)
+        self._queue.put(job)
+        return job.future
+
+    def _start(self):
+        # Started on first use rather than in init_app, so a server that
+        # forks workers after loading the app gets one writer per worker
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name='group-commit', daemon=True)
+                self._writer.start()
+
+    def _next_group(self):
+        group = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(group) < self.max_size:
+            try:
+                # Take what is already waiting, then wait out the window
+                group.append(self._queue.get_nowait())
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    group.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+        return group
+
+    def _write_loop(self):
+        with self.app.app_context():
+            while True:
+                self._commit_group(self._next_group())
+
+    def _commit_group(self, group):
+        session = db.session
+        begin_write(session)
+        done = []  # (job, result, exception)
+        for job in group:
+            try:
+                with session.begin_nested():
+                    result = job.work()
+                done.append((job, result, None))
+            except Exception as e:
+                done.append((job, None, e))
+
+        try:
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            done = [(job, None, exception or e) for job, _, exception in done]
+        finally:
+            db.session.remove()
+
+        for job, result, exception in done:
+            if exception is not None:
+                job.future.set_exception(exception)
+            else:
+                job.future.set_result(result)
+
+
+group_commit = GroupCommitQueue()
@@ -0,0 +1,35 @@
+"""gunicorn settings for running several workers with Prometheus metrics
+
+Usage (from the backend directory):
+    PROMETHEUS_MULTIPROC_DIR=/tmp/workout-tracker-metrics gunicorn -w 4 app:app
+
+Open /api/events streams each hold a request until the client leaves. To
+keep thousands of them, use gevent workers and let the workers wake each
+other through a shared broker directory:
+    EVENTS_BROKER_DIR=/tmp/workout-tracker-events gunicorn -w 4 -k gevent app:app
+"""
+import os
+import shutil
+
+from prometheus_client import multiprocess
+
+
+def on_starting(server):
+    # Samples left over from an earlier run would be added to this one's,
+    # and sockets of old workers would be sent wake-ups nobody reads
+    for variable in ('PROMETHEUS_MULTIPROC_DIR', 'EVENTS_BROKER_DIR'):
+        path = os.environ.get(variable)
+        if path:
+            shutil.rmtree(path, ignore_errors=True)
+            os.makedirs(path)
+
+
+def child_exit(server, worker):
+    # Drop the in-progress gauge of workers that are gone
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        multiprocess.mark_process_dead(worker.pid)
+    if 'EVENTS_BROKER_DIR' in os.environ:
+        try:
+            os.unlink(os.path.join(os.environ['EVENTS_BROKER_DIR'], f'{worker.pid}.sock'))
+        except FileNotFoundError:
+            pass
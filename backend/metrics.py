@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import Response, current_app, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+
+# With several worker processes, PROMETHEUS_MULTIPROC_DIR must point at an
+# empty directory shared by all of them (set before the app is imported).
+# Each worker then writes its samples to memory-mapped files there and
+# /metrics adds them up. See gunicorn.conf.py.
+MULTIPROCESS = 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+
+REQUESTS = Counter(
+    'http_requests_total', 'Requests handled',
+    ['resource', 'method', 'status']
+)
+ERRORS = Counter(
+    'http_request_errors_total', 'Requests that ended in a 5xx response',
+    ['resource', 'method']
+)
+LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time to build a response',
+    ['resource', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+IN_PROGRESS = Gauge(
+    'http_requests_in_progress', 'Requests being handled right now',
+    multiprocess_mode='livesum'
+)
+POOL_WAIT = Histogram(
+    'db_pool_checkout_wait_seconds', 'Time spent waiting for a database connection from the pool',
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+)
+POOL_CONNECT = Histogram(
+    'db_pool_connect_seconds', 'Time spent opening a new database connection for the pool',
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+)
+CACHE_LOOKUPS = Counter(
+    'cache_lookups_total', 'Cache lookups by cache and result (hit or miss)',
+    ['cache', 'result']
+)
+
+
+def record_cache_lookup(cache, hit):
+    CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def _resource_name():
+    """The flask_restful Resource class serving the request, or the endpoint"""
+    if request.url_rule is None:
+        return 'unmatched'
+    view = current_app.view_functions.get(request.endpoint)
+    view_class = getattr(view, 'view_class', None)
+    return view_class.__name__ if view_class is not None else request.endpoint
+
+
+class RequestMetrics:
+    """Prometheus metrics for requests, the connection pool and caches
+
+    Requests are labelled by the Resource class and HTTP method, so
+    /api/routines/1 and /api/routines/2 share one series.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config['METRICS_ENABLED']:
+            return
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+        app.add_url_rule('/metrics', 'metrics', self.export)
+
+        from models import db
+        with app.app_context():
+            self._instrument_pool(db.engine)
+
+    def _instrument_pool(self, engine):
+        """Time pool checkouts, without the connections opened during them
+
+        The pool's checkout event ends the wait and its connect event ends
+        the opening of a new connection, which is reported on its own. The
+        pool has no event for "started waiting", so the call every
+        Connection makes to check one out only marks the start.
+        """
+        state = threading.local()
+        raw_connection = engine.raw_connection
+
+        @wraps(raw_connection)
+        def marked_raw_connection(*args, **kwargs):
+            state.start, state.connecting = time.perf_counter(), 0
+            return raw_connection(*args, **kwargs)
+        engine.raw_connection = marked_raw_connection
+
+        @event.listens_for(engine, 'do_connect')
+        def _connect_started(dialect, conn_rec, cargs, cparams):
+            state.connect_start = time.perf_counter()
+
+        @event.listens_for(engine.pool, 'connect')
+        def _connected(dbapi_connection, connection_record):
+            start = getattr(state, 'connect_start', None)
+            if start is None:
+                return
+            state.connect_start = None
+            elapsed = time.perf_counter() - start
+            POOL_CONNECT.observe(elapsed)
+            state.connecting = getattr(state, 'connecting', 0) + elapsed
+
+        @event.listens_for(engine.pool, 'checkout')
+        def _checked_out(dbapi_connection, connection_record, connection_proxy):
+            start = getattr(state, 'start', None)
+            if start is None:
+                return
+            state.start = None
+            POOL_WAIT.observe(max(time.perf_counter() - start - state.connecting, 0))
+
+    def _start(self):
+        g.metrics_start = time.perf_counter()
+        IN_PROGRESS.inc()
+
+    def _finish(self, response):
+        start = g.get('metrics_start')
+        if start is None:
+            return response
+        resource, method = _resource_name(), request.method
+        LATENCY.labels(resource, method).observe(time.perf_counter() - start)
+        REQUESTS.labels(resource, method, str(response.status_code)).inc()
+        if response.status_code >= 500:
+            ERRORS.labels(resource, method).inc()
+        return response
+
+    def _teardown(self, exc):
+        if g.pop('metrics_start', None) is not None:
+            IN_PROGRESS.dec()
+
+    def export(self):
+        """Serve every metric in the Prometheus text format"""
+        if MULTIPROCESS:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+request_metrics = RequestMetrics()
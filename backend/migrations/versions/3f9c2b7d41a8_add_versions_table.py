@@ -0,0 +1,28 @@
+"""add versions table
+
+Revision ID: 3f9c2b7d41a8
+Revises: e7a37ec37cfa
+Create Date: 2026-10-17 09:12:40.418236
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2b7d41a8'
+down_revision = 'e7a37ec37cfa'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('versions',
+    sa.Column('key', sa.String(length=100), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('versions')
@@ -0,0 +1,60 @@
+"""add variation types table
+
+Revision ID: 5d2a8f3c9e14
+Revises: c41d7e9a0b35
+Create Date: 2026-10-17 16:21:08.552907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2a8f3c9e14'
+down_revision = 'c41d7e9a0b35'
+branch_labels = None
+depends_on = None
+
+DEFAULT_TYPES = [
+    'Standard',
+    'Width Variation',
+    'Angle Variation',
+    'Grip Variation',
+    'Tempo Variation',
+    'Power',
+    'Endurance',
+    'Other'
+]
+
+
+def upgrade():
+    variation_types = op.create_table('variation_types',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('is_default', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+
+    # Backfill the defaults plus every type already used by a variation,
+    # including the ones only kept alive by "Reference for type" rows
+    connection = op.get_bind()
+    used = connection.execute(sa.text(
+        "SELECT DISTINCT variation_type FROM variations "
+        "WHERE variation_type IS NOT NULL AND variation_type != ''"
+    )).scalars()
+    custom = sorted(set(used) - set(DEFAULT_TYPES))
+    op.bulk_insert(variation_types,
+        [{'name': name, 'description': '', 'is_default': True} for name in DEFAULT_TYPES] +
+        [{'name': name, 'description': '', 'is_default': False} for name in custom]
+    )
+
+    # Those placeholder variations are no longer needed to keep a type around
+    op.execute("DELETE FROM variations WHERE name LIKE 'Reference for type: %'")
+
+
+def downgrade():
+    # Deleted reference variations are not restored, so custom types with
+    # no real variations are lost
+    op.drop_table('variation_types')
@@ -0,0 +1,61 @@
+"""add exercise search index
+
+Revision ID: 8b1e5d0c7a2f
+Revises: 3f9c2b7d41a8
+Create Date: 2026-10-17 10:02:15.775301
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1e5d0c7a2f'
+down_revision = '3f9c2b7d41a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 is SQLite only; other databases keep searching with ILIKE
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("""
+        CREATE VIRTUAL TABLE exercises_fts USING fts5(
+            name, description, muscle_group, equipment,
+            content='exercises', content_rowid='id', prefix='2 3'
+        )
+    """)
+    op.execute("""
+        CREATE TRIGGER exercises_fts_insert AFTER INSERT ON exercises BEGIN
+            INSERT INTO exercises_fts(rowid, name, description, muscle_group, equipment)
+            VALUES (new.id, new.name, new.description, new.muscle_group, new.equipment);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER exercises_fts_delete AFTER DELETE ON exercises BEGIN
+            INSERT INTO exercises_fts(exercises_fts, rowid, name, description, muscle_group, equipment)
+            VALUES ('delete', old.id, old.name, old.description, old.muscle_group, old.equipment);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER exercises_fts_update AFTER UPDATE ON exercises BEGIN
+            INSERT INTO exercises_fts(exercises_fts, rowid, name, description, muscle_group, equipment)
+            VALUES ('delete', old.id, old.name, old.description, old.muscle_group, old.equipment);
+            INSERT INTO exercises_fts(rowid, name, description, muscle_group, equipment)
+            VALUES (new.id, new.name, new.description, new.muscle_group, new.equipment);
+        END
+    """)
+    # Index the exercises that already exist
+    op.execute("INSERT INTO exercises_fts(exercises_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS exercises_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS exercises_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS exercises_fts_insert")
+    op.execute("DROP TABLE IF EXISTS exercises_fts")
@@ -0,0 +1,26 @@
+"""add stats indexes
+
+Revision ID: 9a4f6e2b8d17
+Revises: 5d2a8f3c9e14
+Create Date: 2026-10-17 19:42:15.318046
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4f6e2b8d17'
+down_revision = '5d2a8f3c9e14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_routines_day_of_week'), 'routines', ['day_of_week'], unique=False)
+    op.create_index(op.f('ix_variations_variation_type'), 'variations', ['variation_type'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_variations_variation_type'), table_name='variations')
+    op.drop_index(op.f('ix_routines_day_of_week'), table_name='routines')
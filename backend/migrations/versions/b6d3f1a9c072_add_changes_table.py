@@ -0,0 +1,31 @@
+"""add changes table
+
+Revision ID: b6d3f1a9c072
+Revises: 9a4f6e2b8d17
+Create Date: 2026-10-17 20:31:47.602218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d3f1a9c072'
+down_revision = '9a4f6e2b8d17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('changes',
+    sa.Column('seq', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('table_name', sa.String(length=50), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('deleted', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('seq')
+    )
+
+
+def downgrade():
+    op.drop_table('changes')
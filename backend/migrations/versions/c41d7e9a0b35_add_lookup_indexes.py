@@ -0,0 +1,30 @@
+"""add lookup indexes
+
+Revision ID: c41d7e9a0b35
+Revises: 8b1e5d0c7a2f
+Create Date: 2026-10-17 15:04:27.903512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7e9a0b35'
+down_revision = '8b1e5d0c7a2f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_exercises_equipment'), 'exercises', ['equipment'], unique=False)
+    op.create_index('ix_exercises_muscle_group_equipment', 'exercises', ['muscle_group', 'equipment'], unique=False)
+    op.create_index(op.f('ix_variations_exercise_id'), 'variations', ['exercise_id'], unique=False)
+    op.create_index(op.f('ix_variations_routine_id'), 'variations', ['routine_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_variations_routine_id'), table_name='variations')
+    op.drop_index(op.f('ix_variations_exercise_id'), table_name='variations')
+    op.drop_index('ix_exercises_muscle_group_equipment', table_name='exercises')
+    op.drop_index(op.f('ix_exercises_equipment'), table_name='exercises')
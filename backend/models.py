@@ -5,10 +5,11 @@ from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy_serializer import SerializerMixin
 from datetime import datetime, timezone
 
-# Define metadata with naming convention for foreign keys
+# Define metadata with naming convention for foreign keys and indexes
 metadata = MetaData(
     naming_convention={
         "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
+        "ix": "ix_%(column_0_label)s",
     }
 )
 
@@ -16,15 +17,19 @@ db = SQLAlchemy(metadata=metadata)
 
 class Exercise(db.Model, SerializerMixin):
     __tablename__ = 'exercises'
+    __table_args__ = (
+        # Covers muscle_group filters alone and together with equipment
+        db.Index('ix_exercises_muscle_group_equipment', 'muscle_group', 'equipment'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     muscle_group = db.Column(db.String(50))
-    equipment = db.Column(db.String(100))
+    equipment = db.Column(db.String(100), index=True)
     
     # Relationship with variations
-    variations = db.relationship('Variation', back_populates='exercise', cascade="all, delete-orphan")
+    variations = db.relationship('Variation', back_populates='exercise', cascade="all, delete-orphan", order_by='Variation.id')
     
     # Association proxy to get routines through variations
     routines = association_proxy('variations', 'routine')
@@ -49,13 +54,13 @@ class Routine(db.Model, SerializerMixin):
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    day_of_week = db.Column(db.String(10))
+    day_of_week = db.Column(db.String(10), index=True)
     description = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, onupdate=lambda: datetime.now(timezone.utc))
     
     # Relationship with variations
-    variations = db.relationship('Variation', back_populates='routine', cascade="all, delete-orphan")
+    variations = db.relationship('Variation', back_populates='routine', cascade="all, delete-orphan", order_by='Variation.id')
     
     # Association proxy to get exercises through variations
     exercises = association_proxy('variations', 'exercise')
@@ -79,12 +84,12 @@ class Variation(db.Model, SerializerMixin):
     __tablename__ = 'variations'
     
     id = db.Column(db.Integer, primary_key=True)
-    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id'), nullable=False)
-    routine_id = db.Column(db.Integer, db.ForeignKey('routines.id'), nullable=False)
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id'), nullable=False, index=True)
+    routine_id = db.Column(db.Integer, db.ForeignKey('routines.id'), nullable=False, index=True)
     
     # Variation details - just name and variation_type (no sets, reps, etc.)
     name = db.Column(db.String(100), nullable=False)
-    variation_type = db.Column(db.String(50), default='Standard')
+    variation_type = db.Column(db.String(50), default='Standard', index=True)
     
     # Relationships
     exercise = db.relationship('Exercise', back_populates='variations')
@@ -103,4 +108,48 @@ class Variation(db.Model, SerializerMixin):
         return name
     
     def __repr__(self):
-        return f"<Variation {self.name} of {self.exercise_id} in routine {self.routine_id}>"
\ No newline at end of file
+        return f"<Variation {self.name} of {self.exercise_id} in routine {self.routine_id}>"
+
+class VariationType(db.Model, SerializerMixin):
+    __tablename__ = 'variation_types'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False, unique=True)
+    description = db.Column(db.Text, nullable=False, default='')
+    is_default = db.Column(db.Boolean, nullable=False, default=False)
+    
+    # Validation for name
+    @validates('name')
+    def validate_name(self, key, name):
+        if not name or len(name.strip()) == 0:
+            raise ValueError("Variation type name cannot be empty")
+        if len(name) > 50:
+            raise ValueError("Variation type name must be less than 50 characters")
+        return name
+    
+    def __repr__(self):
+        return f"<VariationType {self.name}>"
+
+class TableVersion(db.Model):
+    __tablename__ = 'versions'
+    
+    # A table name ("routines"), or the change log's last sequence number
+    # ("changes") and horizon ("changes:horizon")
+    key = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<TableVersion {self.key}={self.version}>"
+
+class Change(db.Model):
+    __tablename__ = 'changes'
+    
+    # Handed out from the "changes" version counter in commit order, never reused
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    table_name = db.Column(db.String(50), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    deleted = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    
+    def __repr__(self):
+        return f"<Change {self.seq} {'delete' if self.deleted else 'upsert'} {self.table_name}:{self.row_id}>"
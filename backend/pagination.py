@@ -0,0 +1,44 @@
+from flask import current_app
+
+
+def add_page_arguments(parser, cursor_type=int):
+    """Add the optional ?limit= and ?after= keyset pagination arguments
+
+    ?after= is an id unless cursor_type says otherwise, e.g. str for
+    resources that decode cursors of their own.
+    """
+    parser.add_argument('limit', type=int, location='args')
+    parser.add_argument('after', type=cursor_type, location='args')
+    return parser
+
+
+def is_paginated(args):
+    return args['limit'] is not None or args['after'] is not None
+
+
+def get_page_limit(args):
+    """Get the page size for a request, or raise ValueError if it is out of range"""
+    limit = args['limit'] if args['limit'] is not None else current_app.config['PAGE_SIZE']
+    max_limit = current_app.config['MAX_PAGE_SIZE']
+    if limit < 1 or limit > max_limit:
+        raise ValueError(f"limit must be between 1 and {max_limit}")
+    return limit
+
+
+def paginate(query, key_column, limit, after=None):
+    """Get one page of a query ordered by key_column, starting after a cursor
+
+    Returns the rows and the cursor for the next page, or None on the last
+    page. key_column must be unique (usually the primary key) so the order
+    is stable across pages.
+    """
+    if after is not None:
+        query = query.filter(key_column > after)
+
+    # Fetch one extra row to know whether there is a next page
+    rows = query.order_by(key_column).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, getattr(rows[-1], key_column.key)
@@ -0,0 +1,26 @@
+from sqlalchemy.orm import joinedload, selectinload
+from models import Exercise, Variation
+
+
+def exercise_details():
+    """Loader option for the relationships Exercise.to_dict() serializes
+
+    An exercise's variations and their routines come in with one more
+    query for all exercises loaded together, instead of one per exercise
+    and one per routine.
+    """
+    return selectinload(Exercise.variations).joinedload(Variation.routine)
+
+
+def get_routine_variations(routine_id):
+    """Get all variations for a routine joined to their exercises in one query
+
+    Exercise.to_dict() also serializes the exercise's own variations and
+    their routines, so those are joined in as well to keep serialization
+    from lazy loading them one row at a time.
+    """
+    return Variation.query.options(
+        joinedload(Variation.exercise)
+        .joinedload(Exercise.variations)
+        .joinedload(Variation.routine)
+    ).filter(Variation.routine_id == routine_id).order_by(Variation.id).all()
@@ -0,0 +1,117 @@
+import re
+
+from sqlalchemy import DDL, and_, column, event, false, inspect, literal_column, or_, table, text
+
+from models import db, Exercise
+
+# Full-text index over the exercise catalog, kept in sync with the
+# exercises table by triggers. Only available on SQLite (FTS5).
+FTS_TABLE = 'exercises_fts'
+
+FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, description, muscle_group, equipment,
+        content='exercises', content_rowid='id', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS exercises_fts_insert AFTER INSERT ON exercises BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description, muscle_group, equipment)
+        VALUES (new.id, new.name, new.description, new.muscle_group, new.equipment);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS exercises_fts_delete AFTER DELETE ON exercises BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, muscle_group, equipment)
+        VALUES ('delete', old.id, old.name, old.description, old.muscle_group, old.equipment);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS exercises_fts_update AFTER UPDATE ON exercises BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, muscle_group, equipment)
+        VALUES ('delete', old.id, old.name, old.description, old.muscle_group, old.equipment);
+        INSERT INTO {FTS_TABLE}(rowid, name, description, muscle_group, equipment)
+        VALUES (new.id, new.name, new.description, new.muscle_group, new.equipment);
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+# Column weights for bm25(): name, description, muscle_group, equipment
+RANK = f'bm25({FTS_TABLE}, 10.0, 1.0, 2.0, 2.0)'
+
+_fts = table(FTS_TABLE, column('rowid'))
+
+# Create the index alongside the exercises table for db.create_all(), and
+# drop it with the table so a rebuilt database doesn't keep stale entries
+for statement in FTS_DDL:
+    event.listen(Exercise.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(Exercise.__table__, 'before_drop',
+             DDL(f'DROP TABLE IF EXISTS {FTS_TABLE}').execute_if(dialect='sqlite'))
+
+# Whether each engine has the index, checked once per engine
+_has_index = {}
+
+
+def has_search_index():
+    engine = db.engine
+    if engine not in _has_index:
+        _has_index[engine] = engine.dialect.name == 'sqlite' and inspect(engine).has_table(FTS_TABLE)
+    return _has_index[engine]
+
+
+def to_match_query(term):
+    """Turn a search box term into an FTS5 query
+
+    Every word must match, and the last one matches as a prefix so results
+    show up while the user is still typing.
+    """
+    words = re.findall(r'\w+', term)
+    if not words:
+        return None
+    quoted = [f'"{word}"' for word in words]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_exercises(query, term):
+    """Filter an Exercise query by a search term, best matches first
+
+    Uses the FTS5 index ranked with BM25 over name, description, muscle
+    group and equipment when it exists, and a name ILIKE otherwise.
+    """
+    if not has_search_index():
+        return query.filter(Exercise.name.ilike(f'%{term}%'))
+
+    match = to_match_query(term)
+    if match is None:
+        return query.filter(false())
+    return query.join(_fts, _fts.c.rowid == Exercise.id).filter(
+        text(f'{FTS_TABLE} MATCH :match').bindparams(match=match)
+    ).order_by(text(RANK))
+
+
+def decode_search_cursor(cursor):
+    """Get the (rank, id) of a cursor from paginate_search(), or raise ValueError"""
+    rank, _, exercise_id = cursor.rpartition(':')
+    try:
+        return float(rank), int(exercise_id)
+    except ValueError:
+        raise ValueError("after must be the next_cursor of a search") from None
+
+
+def paginate_search(query, term, limit, after=None):
+    """Get one page of search results, best matches first, starting after a cursor
+
+    Results are ordered by (rank, id), so matches that rank the same still
+    page in a stable order. Cursors are "<rank>:<id>" strings, passed back
+    decoded with decode_search_cursor(). Returns the rows and the cursor
+    for the next page, or None on the last page.
+    """
+    # Without the index every match ranks the same and the order is by id
+    rank = literal_column(RANK if has_search_index() else '0.0')
+    query = search_exercises(query, term)
+    if after is not None:
+        after_rank, after_id = after
+        query = query.filter(or_(rank > after_rank, and_(rank == after_rank, Exercise.id > after_id)))
+
+    # Fetch one extra row to know whether there is a next page
+    rows = query.add_columns(rank).order_by(Exercise.id).limit(limit + 1).all()
+    exercises = [exercise for exercise, _ in rows[:limit]]
+    if len(rows) <= limit:
+        return exercises, None
+    last_rank = rows[limit - 1][1]
+    return exercises, f'{last_rank!r}:{exercises[-1].id}'
@@ -1,5 +1,69 @@
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete
+
 from app import app, db
+from bulk import bulk_insert
+from changes import reset_changes
 from models import Exercise, Routine, Variation
+from variation_types import DEFAULT_TYPES
+from versions import record_changes
+
+# Rows sent per executemany when generating data
+BATCH_SIZE = 10000
+
+# Named dataset sizes; "demo" is the hand-written data in seed_database()
+PRESETS = {
+    'demo': None,
+    'small': {'exercises': 200, 'routines': 1000, 'variations_per_routine': 8},
+    'large': {'exercises': 10000, 'routines': 100000, 'variations_per_routine': 10},
+}
+
+# Movement patterns: (name, muscle group, description, equipment it's done with)
+MOVEMENTS = [
+    ('Bench Press', 'Chest', 'A compound press for the chest', ['Barbell', 'Dumbbells', 'Machine']),
+    ('Push-Up', 'Chest', 'A bodyweight press for chest and triceps', ['None']),
+    ('Fly', 'Chest', 'An isolation exercise for the chest', ['Dumbbells', 'Cable Machine']),
+    ('Row', 'Back', 'A horizontal pull for the upper back', ['Barbell', 'Dumbbells', 'Cable Machine']),
+    ('Pull-Up', 'Back', 'A vertical bodyweight pull', ['Pull-Up Bar']),
+    ('Pulldown', 'Back', 'A vertical pull for the lats', ['Cable Machine', 'Machine']),
+    ('Deadlift', 'Back', 'A hip hinge that works the whole posterior chain', ['Barbell', 'Dumbbells', 'Kettlebell']),
+    ('Squat', 'Legs', 'A compound movement for the legs', ['Barbell', 'Dumbbells', 'None']),
+    ('Lunge', 'Legs', 'A single-leg exercise for legs and balance', ['Dumbbells', 'None']),
+    ('Leg Press', 'Legs', 'A machine press for the quads', ['Machine']),
+    ('Hip Thrust', 'Glutes', 'A hip extension for the glutes', ['Barbell', 'Machine']),
+    ('Leg Curl', 'Hamstrings', 'An isolation exercise for the hamstrings', ['Machine']),
+    ('Overhead Press', 'Shoulders', 'A vertical press for the shoulders', ['Barbell', 'Dumbbells']),
+    ('Lateral Raise', 'Shoulders', 'An isolation exercise for the side delts', ['Dumbbells', 'Cable Machine']),
+    ('Curl', 'Arms', 'An isolation exercise for the biceps', ['Barbell', 'Dumbbells', 'Cable Machine']),
+    ('Tricep Extension', 'Arms', 'An isolation exercise for the triceps', ['Dumbbells', 'Cable Machine']),
+    ('Dip', 'Arms', 'A bodyweight press for the triceps', ['Parallel Bars']),
+    ('Plank', 'Core', 'An isometric core exercise', ['None']),
+    ('Crunch', 'Core', 'A flexion exercise for the abs', ['None', 'Cable Machine']),
+    ('Swing', 'Glutes', 'A ballistic hip hinge', ['Kettlebell']),
+]
+# How equipment reads in an exercise name; bodyweight gear goes unnamed
+EQUIPMENT_LABELS = {'Dumbbells': 'Dumbbell', 'Cable Machine': 'Cable', 'Parallel Bars': '', 'Pull-Up Bar': '', 'None': ''}
+MODIFIERS = ['', 'Incline', 'Decline', 'Seated', 'Standing', 'Single Arm', 'Paused', 'Tempo', 'Wide Grip', 'Close Grip']
+
+ROUTINE_NAMES = ['Upper Body', 'Lower Body', 'Full Body', 'Push Day', 'Pull Day', 'Leg Day', 'Core and Mobility', 'Conditioning']
+ROUTINE_FOCUS = {
+    'Upper Body': 'chest, back, and arms',
+    'Lower Body': 'legs and core',
+    'Full Body': 'all major muscle groups',
+    'Push Day': 'chest, shoulders, and triceps',
+    'Pull Day': 'back and biceps',
+    'Leg Day': 'quads, hamstrings, and glutes',
+    'Core and Mobility': 'core strength and range of motion',
+    'Conditioning': 'work capacity',
+}
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Most variations are the standard form of an exercise
+TYPE_WEIGHTS = [10 if name == 'Standard' else 1 for name in DEFAULT_TYPES]
 
 def seed_database():
     """Seed the database with initial data"""
@@ -10,6 +74,8 @@ def seed_database():
         db.session.query(Variation).delete()
         db.session.query(Exercise).delete()
         db.session.query(Routine).delete()
+        # Bulk deletes aren't logged, so every client has to resync
+        reset_changes(db.session)
         db.session.commit()
         
         print("Creating exercises...")
@@ -200,5 +266,145 @@ def seed_database():
         
         print("Database seeded successfully!")
 
+
+def _exercise_rows(count):
+    # Plain movements first, so even small catalogs cover every muscle group
+    combos = [
+        (modifier, equipment, movement)
+        for modifier in MODIFIERS
+        for movement in MOVEMENTS
+        for equipment in movement[3]
+    ]
+    for i in range(count):
+        modifier, equipment, (move, muscle, description, _) = combos[i % len(combos)]
+        words = [modifier, EQUIPMENT_LABELS.get(equipment, equipment), move]
+        name = ' '.join(word for word in words if word)
+        # Number repeats once every combination has been used
+        if i >= len(combos):
+            name = f'{name} {i // len(combos) + 1}'
+        yield {
+            'name': name,
+            'description': description,
+            'muscle_group': muscle,
+            'equipment': equipment,
+        }
+
+
+def _routine_rows(count, rng):
+    start = datetime(2025, 1, 1)
+    for i in range(count):
+        name = rng.choice(ROUTINE_NAMES)
+        yield {
+            'name': f'{name} {i + 1}',
+            'day_of_week': DAYS[i % len(DAYS)],
+            'description': f'Focus on {ROUTINE_FOCUS[name]}',
+            'created_at': start + timedelta(minutes=i * 7 + rng.randrange(7)),
+        }
+
+
+def _variation_rows(routine_ids, exercise_names, per_routine, rng):
+    exercise_ids = list(exercise_names)
+    per_routine = min(per_routine, len(exercise_ids))
+    for routine_id in routine_ids:
+        variation_types = rng.choices(DEFAULT_TYPES, TYPE_WEIGHTS, k=per_routine)
+        for exercise_id, variation_type in zip(rng.sample(exercise_ids, per_routine), variation_types):
+            yield {
+                'exercise_id': exercise_id,
+                'routine_id': routine_id,
+                'name': f'{exercise_names[exercise_id]} ({variation_type})',
+                'variation_type': variation_type,
+            }
+
+
+def _batches(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate_database(exercises, routines, variations_per_routine, seed=42):
+    """Replace all data with generated exercises, routines and variations
+
+    The same arguments always produce the same rows. Everything is
+    loaded with Core executemany batches in one transaction.
+    """
+    with app.app_context():
+        start = time.perf_counter()
+        rng = random.Random(seed)
+        session = db.session
+        connection = session.connection()
+
+        print("Clearing existing data...")
+        for model in (Variation, Exercise, Routine):
+            session.execute(delete(model))
+        record_changes(session, {'variations', 'exercises', 'routines'})
+
+        print(f"Creating {exercises} exercises...")
+        exercise_names = {}  # id -> name
+        for batch in _batches(_exercise_rows(exercises)):
+            ids = bulk_insert(session, Exercise.__table__, batch)
+            exercise_names.update(zip(ids, (row['name'] for row in batch)))
+
+        print(f"Creating {routines} routines...")
+        routine_ids = []
+        for batch in _batches(_routine_rows(routines, rng)):
+            ids = bulk_insert(session, Routine.__table__, batch)
+            record_changes(session, {'routines'}, routine_ids=ids)
+            routine_ids += ids
+
+        print(f"Creating {routines * variations_per_routine} variations...")
+        # Building the indexes once after the load is much faster than
+        # updating them for every row
+        indexes = list(Variation.__table__.indexes)
+        for index in indexes:
+            index.drop(connection)
+
+        rows = _variation_rows(routine_ids, exercise_names, variations_per_routine, rng)
+        for batch in _batches(rows):
+            session.execute(Variation.__table__.insert(), batch)
+        for index in indexes:
+            index.create(connection)
+
+        # None of this is in the change log, so every client has to resync
+        reset_changes(session)
+        session.commit()
+        print(f"Database seeded in {time.perf_counter() - start:.1f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Seed the database with the demo data, or generate a dataset of any size"
+    )
+    parser.add_argument('--preset', choices=PRESETS, help="named dataset (default: demo)")
+    parser.add_argument('--exercises', type=int, help="number of exercises to generate")
+    parser.add_argument('--routines', type=int, help="number of routines to generate")
+    parser.add_argument('--variations-per-routine', type=int, help="variations to generate per routine")
+    parser.add_argument('--seed', type=int, default=42, help="random seed for generated data (default: 42)")
+    args = parser.parse_args(argv)
+
+    sizes = {
+        'exercises': args.exercises,
+        'routines': args.routines,
+        'variations_per_routine': args.variations_per_routine,
+    }
+    given = {key: value for key, value in sizes.items() if value is not None}
+    if args.preset == 'demo' and given:
+        parser.error("the demo preset can't be combined with sizes")
+    if any(value < 0 for value in given.values()):
+        parser.error("sizes must not be negative")
+
+    if not given and args.preset in (None, 'demo'):
+        seed_database()
+        return
+
+    # Sizes not given come from the preset, or from "small"
+    sizes = {**PRESETS[args.preset or 'small'], **given}
+    generate_database(seed=args.seed, **sizes)
+
 if __name__ == '__main__':
-    seed_database()
\ No newline at end of file
+    main()
\ No newline at end of file
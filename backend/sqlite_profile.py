@@ -0,0 +1,90 @@
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+
+class SQLiteProfile:
+    """PRAGMAs for every SQLite connection, and pool sizing for file databases
+
+    WAL lets readers keep going while a write commits, and synchronous=NORMAL
+    only syncs at checkpoints instead of on every commit (a power cut can
+    lose the last commits but never corrupts the file). busy_timeout makes
+    a second writer wait for the lock instead of failing with "database is
+    locked". SQLite leaves foreign_keys off unless each connection asks.
+
+    pysqlite's own transaction handling is turned off: it only sends BEGIN
+    before INSERT, UPDATE or DELETE, so a SAVEPOINT opened first starts
+    the transaction itself and releasing it commits. SQLAlchemy sends
+    BEGIN instead whenever it starts a transaction, which keeps nested
+    savepoints (and the group commit built on them) inside one real
+    transaction. Writes start with begin_write() so they take the write
+    lock up front.
+
+    init_app must run before db.init_app so the pool options reach the
+    engine. Options already in SQLALCHEMY_ENGINE_OPTIONS are kept.
+    """
+
+    def __init__(self, app=None):
+        self.pragmas = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.pragmas = {
+            'journal_mode': config['SQLITE_JOURNAL_MODE'],
+            'synchronous': config['SQLITE_SYNCHRONOUS'],
+            'mmap_size': config['SQLITE_MMAP_SIZE'],
+            'cache_size': config['SQLITE_CACHE_SIZE'],
+            'busy_timeout': config['SQLITE_BUSY_TIMEOUT'],
+            'foreign_keys': 'on' if config['SQLITE_FOREIGN_KEYS'] else 'off',
+        }
+
+        url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+        # In-memory databases share one connection through a StaticPool,
+        # which takes no sizing options
+        if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+            return
+        options = config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        options.setdefault('pool_size', config['DB_POOL_SIZE'])
+        options.setdefault('max_overflow', config['DB_MAX_OVERFLOW'])
+        options.setdefault('pool_timeout', config['DB_POOL_TIMEOUT'])
+
+    def apply(self, dbapi_connection):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in self.pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
+
+
+sqlite_profile = SQLiteProfile()
+
+
+def begin_write(session):
+    """Start the session's next transaction with BEGIN IMMEDIATE
+
+    A transaction that reads first only asks for the write lock at its
+    first write, and if another connection has committed since the read
+    SQLite fails it with "database is locked" at once instead of waiting
+    out busy_timeout. Taking the lock at BEGIN makes the write wait its
+    turn. Whatever the session had open is closed first, so reads the
+    request made before the write are not part of it.
+    """
+    session.close()
+    session.connection(execution_options={'sqlite_begin': 'IMMEDIATE'})
+
+
+@event.listens_for(Engine, 'connect')
+def _apply_pragmas(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.isolation_level = None
+        sqlite_profile.apply(dbapi_connection)
+
+
+@event.listens_for(Engine, 'begin')
+def _begin(conn):
+    if conn.dialect.name == 'sqlite':
+        conn.exec_driver_sql(f"BEGIN {conn.get_execution_options().get('sqlite_begin', '')}".rstrip())
@@ -0,0 +1,96 @@
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import and_, func, select
+
+from metrics import record_cache_lookup
+from models import db, Exercise, Routine, Variation
+from versions import get_versions
+
+# Version keys of the tables the aggregates read
+TABLE_KEYS = ('exercises', 'routines', 'variations')
+
+
+def _group_counts(column, where=None):
+    """[{<column>: value, "count": n}] for each value, most common first"""
+    query = select(column, func.count()).group_by(column)
+    if where is not None:
+        query = query.where(where)
+    rows = db.session.execute(query).all()
+    rows.sort(key=lambda row: (-row[1], row[0] is None, row[0] or ''))
+    return [{column.key: value, "count": count} for value, count in rows]
+
+
+def compute_stats(routine_id=None, day_of_week=None):
+    """Count routines, exercises and variations grouped by their categories
+
+    Without filters, exercises are counted over the whole catalog. With a
+    routine or day filter, routines and variations are limited to the
+    matching routines, and exercises to the ones their variations use.
+    Every figure is one GROUP BY query, so the response size only depends
+    on the number of distinct categories.
+    """
+    conditions = []
+    if routine_id is not None:
+        conditions.append(Routine.id == routine_id)
+    if day_of_week is not None:
+        conditions.append(Routine.day_of_week == day_of_week)
+
+    routine_filter = variation_filter = exercise_filter = None
+    if conditions:
+        routine_filter = and_(*conditions)
+        routine_ids = select(Routine.id).where(routine_filter)
+        variation_filter = Variation.routine_id.in_(routine_ids)
+        exercise_filter = Exercise.id.in_(select(Variation.exercise_id).where(variation_filter))
+
+    routines_by_day = _group_counts(Routine.day_of_week, routine_filter)
+    variations_by_type = _group_counts(Variation.variation_type, variation_filter)
+    exercises_by_muscle_group = _group_counts(Exercise.muscle_group, exercise_filter)
+    exercises_by_equipment = _group_counts(Exercise.equipment, exercise_filter)
+    return {
+        "totals": {
+            "routines": sum(row["count"] for row in routines_by_day),
+            "exercises": sum(row["count"] for row in exercises_by_muscle_group),
+            "variations": sum(row["count"] for row in variations_by_type)
+        },
+        "routines_by_day": routines_by_day,
+        "variations_by_type": variations_by_type,
+        "exercises_by_muscle_group": exercises_by_muscle_group,
+        "exercises_by_equipment": exercises_by_equipment
+    }
+
+
+class StatsCache:
+    """compute_stats() results keyed on the filters and the table versions
+
+    Any commit to the three tables bumps a version and so moves later
+    requests to a new key; old entries are never read again and age out
+    of the LRU. The versions live in the database, so a worker never
+    serves aggregates older than the data it can see.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, routine_id=None, day_of_week=None):
+        versions = get_versions(TABLE_KEYS)
+        key = (tuple(versions[k] for k in TABLE_KEYS), routine_id, day_of_week)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+        record_cache_lookup('stats', result is not None)
+        if result is not None:
+            return result
+
+        result = compute_stats(routine_id, day_of_week)
+        with self._lock:
+            self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+
+stats_cache = StatsCache()
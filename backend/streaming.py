@@ -0,0 +1,33 @@
+from itertools import islice
+
+from flask import Response, stream_with_context
+
+from representations import dumps_items
+from serializers import serialize_all
+
+# Rows loaded, serialized and sent at a time
+STREAM_CHUNK_SIZE = 1000
+
+
+def stream_json_array(query, only=()):
+    """Response sending a query's rows as one JSON array, a chunk at a time
+
+    Rows are fetched with yield_per and each chunk is serialized, encoded
+    and sent before the next one is loaded, so memory use doesn't grow
+    with the number of rows and the first bytes go out right away. The
+    query can't joinedload collections (yield_per doesn't allow it);
+    selectinload them instead, which loads them once per chunk.
+    """
+    def generate():
+        rows = iter(query.yield_per(STREAM_CHUNK_SIZE))
+        # The opening bracket goes out with the first rows
+        separator = b'['
+        while True:
+            chunk = list(islice(rows, STREAM_CHUNK_SIZE))
+            if not chunk:
+                break
+            yield separator + dumps_items(serialize_all(chunk, only=only))
+            separator = b','
+        yield b']\n' if separator == b',' else b'[]\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
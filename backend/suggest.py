@@ -0,0 +1,289 @@
+import heapq
+import re
+import sys
+import threading
+from bisect import bisect_left, insort
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from changes import SEQ_KEY, HORIZON_KEY
+from models import db, Change, Exercise
+from versions import get_versions
+
+# Most prefix entries looked at per lookup, to bound very short queries
+MAX_SCAN = 2000
+# Most changed exercises refresh() applies one by one before rebuilding instead
+MAX_CATCH_UP = 10000
+
+
+def normalize(text):
+    return ' '.join(re.findall(r'\w+', text.lower()))
+
+
+def bounded_distance(a, b, limit):
+    """Levenshtein distance between a and b, or limit + 1 once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def max_typos(word):
+    """How many typos to tolerate in a word of this length"""
+    if len(word) < 3:
+        return 0
+    return 1 if len(word) < 6 else 2
+
+
+class _Entries:
+    """One immutable state of the index
+
+    Lookups read whichever state is current when they start, so they never
+    see a half-applied update and need no lock. Updates build a new state
+    and swap it in.
+    """
+
+    def __init__(self, keys=(), names=None, words=None, initials=None):
+        self.keys = list(keys)  # sorted (key, word position, exercise id)
+        self.names = names or {}  # exercise id -> name
+        self.words = words or {}  # word -> set of exercise ids
+        self.initials = initials or {}  # first letter -> set of words
+
+    def updated(self, upserts, deleted=()):
+        """Get a new state with upserts (id -> name) added and deleted ids removed
+
+        Containers shared with this state are copied before they change,
+        so this one stays intact for lookups that are still reading it.
+        """
+        keys = list(self.keys)
+        names = dict(self.names)
+        words = dict(self.words)
+        initials = dict(self.initials)
+        copied = set()  # sets of words and initials already copied for the new state
+
+        def own(mapping, key):
+            if (id(mapping), key) not in copied:
+                mapping[key] = set(mapping.get(key, ()))
+                copied.add((id(mapping), key))
+            return mapping[key]
+
+        for exercise_id in set(upserts) | set(deleted):
+            if exercise_id not in names:
+                continue
+            old = normalize(names.pop(exercise_id)).split()
+            for position in range(len(old)):
+                i = bisect_left(keys, (' '.join(old[position:]), position, exercise_id))
+                if i < len(keys) and keys[i][2] == exercise_id:
+                    del keys[i]
+            for word in old:
+                if word in words and exercise_id in words[word]:
+                    own(words, word).discard(exercise_id)
+                    if not words[word]:
+                        del words[word]
+                        # An upsert adding the word back needs a new set
+                        copied.discard((id(words), word))
+                        own(initials, word[0]).discard(word)
+
+        # A few keys are inserted in place, many are appended and sorted once
+        insert = insort if len(upserts) <= 100 else list.append
+        for exercise_id, name in upserts.items():
+            new = normalize(name).split()
+            names[exercise_id] = name
+            for position in range(len(new)):
+                insert(keys, (' '.join(new[position:]), position, exercise_id))
+            for word in new:
+                if word.isdigit():
+                    continue
+                if word not in words:
+                    own(initials, word[0]).add(word)
+                own(words, word).add(exercise_id)
+        if insert is list.append:
+            keys.sort()
+        return _Entries(keys, names, words, initials)
+
+    def suggest(self, query, limit):
+        prefix_matches = {}  # exercise id -> rank
+        keys = self.keys
+        start = bisect_left(keys, (query,))
+        for i in range(start, min(start + MAX_SCAN, len(keys))):
+            key, position, exercise_id = keys[i]
+            if not key.startswith(query):
+                break
+            rank = (position, len(self.names[exercise_id]), self.names[exercise_id])
+            if exercise_id not in prefix_matches or rank < prefix_matches[exercise_id]:
+                prefix_matches[exercise_id] = rank
+        best = heapq.nsmallest(limit, prefix_matches, key=prefix_matches.get)
+
+        # Typo matches always rank after exact prefix matches
+        if len(best) < limit:
+            best += self._fuzzy_matches(query, limit - len(best), exclude=set(best))
+        return [{"id": exercise_id, "name": self.names[exercise_id]} for exercise_id in best]
+
+    def _name_rank(self, exercise_id):
+        name = self.names[exercise_id]
+        return len(name), name
+
+    def _fuzzy_matches(self, query, count, exclude):
+        """Get up to count ids whose words match every query word within a few typos
+
+        The last word is compared as a prefix since it may still be typed.
+        Results are ordered by total edit distance, then by name length.
+        """
+        query_words = query.split()
+        levels_per_word = []  # per query word: one set of ids per edit distance
+        for i, query_word in enumerate(query_words):
+            limit = max_typos(query_word)
+            is_last = i == len(query_words) - 1
+            levels = [set() for _ in range(limit + 1)]
+            for word in self.initials.get(query_word[0], ()):
+                if is_last:
+                    # Compare with prefixes of about the same length, so a
+                    # missing or extra letter still lines up
+                    distance = min(
+                        bounded_distance(query_word, word[:length], limit)
+                        for length in range(max(len(query_word) - 1, 1), len(query_word) + 2)
+                    )
+                else:
+                    distance = bounded_distance(query_word, word, limit)
+                if distance <= limit:
+                    levels[distance] |= self.words[word]
+            if not any(levels):
+                return []
+            levels_per_word.append(levels)
+
+        if len(levels_per_word) == 1:
+            # Walk the distance levels in order so only the best few ids
+            # have to be ranked by name
+            found, seen = [], set(exclude)
+            for ids in levels_per_word[0]:
+                ids = ids - seen
+                found += heapq.nsmallest(count - len(found), ids, key=self._name_rank)
+                seen |= ids
+                if len(found) >= count:
+                    break
+            return found
+
+        matched = [set().union(*levels) for levels in levels_per_word]
+        matched.sort(key=len)
+        candidates = matched[0].intersection(*matched[1:]) - exclude
+
+        def rank(exercise_id):
+            distance = sum(
+                next(d for d, ids in enumerate(levels) if exercise_id in ids)
+                for levels in levels_per_word
+            )
+            return (distance,) + self._name_rank(exercise_id)
+        return heapq.nsmallest(count, candidates, key=rank)
+
+
+class SuggestIndex:
+    """In-memory typeahead index over exercise names
+
+    Names are kept in a sorted array keyed on every word suffix of the
+    normalized name ("bench press", "press"), so any word can start a
+    match and a lookup is a binary search plus a short scan. When that
+    finds too few names, each query word is matched against the
+    vocabulary of name words within a small edit distance. Only words
+    with the same first letter are compared, which keeps the fallback
+    fast on large catalogs.
+
+    Writes from other workers are picked up from the change log, and the
+    whole index is rebuilt once the log no longer covers what it missed.
+    """
+
+    def __init__(self):
+        self._entries = _Entries()
+        self._seq = None  # change log sequence the entries are up to date with
+        self._version = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Build the index at startup if the database already has exercises"""
+        with app.app_context():
+            try:
+                self.refresh()
+            except SQLAlchemyError:
+                # Tables not created yet, e.g. before the first migration
+                db.session.rollback()
+
+    def add(self, exercise_id, name):
+        """Show an exercise this worker just created without waiting for refresh()"""
+        with self._lock:
+            self._entries = self._entries.updated({exercise_id: name})
+
+    def refresh(self):
+        """Catch up with exercises committed elsewhere, e.g. by other workers
+
+        Only runs queries when the exercises version has changed. Entries
+        for exercises logged since the last refresh are replaced with the
+        rows' current names, or dropped for deleted ones. After a reset of
+        the log (like reseeding), compaction past the last refresh, or more
+        than MAX_CATCH_UP changes, the index is rebuilt from the table.
+        """
+        versions = get_versions(['exercises', SEQ_KEY, HORIZON_KEY])
+        if versions['exercises'] == self._version:
+            return
+
+        with self._lock:
+            if versions['exercises'] == self._version:
+                return
+            entries = None
+            if self._seq is not None and self._seq >= versions[HORIZON_KEY]:
+                table = Change.__table__
+                changed = db.session.execute(
+                    select(table.c.row_id, table.c.deleted)
+                    .where(table.c.seq > self._seq, table.c.seq <= versions[SEQ_KEY],
+                           table.c.table_name == 'exercises')
+                    .order_by(table.c.seq).limit(MAX_CATCH_UP + 1)
+                ).all()
+                if len(changed) <= MAX_CATCH_UP:
+                    ids = {row_id for row_id, _ in changed}
+                    upserts = dict(db.session.execute(
+                        select(Exercise.id, Exercise.name).where(Exercise.id.in_(ids))
+                    ).all()) if ids else {}
+                    entries = self._entries.updated(upserts, ids - set(upserts))
+            if entries is None:
+                entries = _Entries().updated(dict(db.session.execute(select(Exercise.id, Exercise.name)).all()))
+            self._entries = entries
+            self._seq = versions[SEQ_KEY]
+            self._version = versions['exercises']
+
+    def suggest(self, query, limit=10):
+        query = normalize(query)
+        if not query:
+            return []
+        return self._entries.suggest(query, limit)
+
+    def stats(self):
+        """Entry counts and an estimate of the index's memory footprint in bytes"""
+        entries = self._entries
+        size = sum(sys.getsizeof(part) for part in (entries.keys, entries.names, entries.words, entries.initials))
+        for entry in entries.keys:
+            size += sys.getsizeof(entry) + sys.getsizeof(entry[0])
+        for name in entries.names.values():
+            size += sys.getsizeof(name)
+        for word, ids in entries.words.items():
+            size += sys.getsizeof(word) + sys.getsizeof(ids)
+        for words in entries.initials.values():
+            size += sys.getsizeof(words)
+        return {
+            "exercises": len(entries.names),
+            "keys": len(entries.keys),
+            "words": len(entries.words),
+            "memory_bytes": size
+        }
+
+
+suggest_index = SuggestIndex()
@@ -0,0 +1,54 @@
+import os
+import sys
+
+# Use a throwaway in-memory database before the app reads its config, and
+# skip the response cache so every request reaches the database
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['CACHE_TTL'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import event
+
+from app import app as flask_app, db
+
+
+@pytest.fixture
+def app():
+    """The app with empty tables, inside an app context"""
+    with flask_app.app_context():
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def capture_statements(client):
+    """Get a function that GETs a path and returns the (statement, parameters) it ran"""
+    def capture(path):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        # Start from an empty identity map, as a new request would
+        db.session.remove()
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            response = client.get(path)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+            # The request ran in this app context, so its session is still
+            # in a transaction on the one in-memory connection
+            db.session.remove()
+
+        assert response.status_code == 200, response.status_code
+        return statements
+    return capture
@@ -0,0 +1,66 @@
+"""The changes feed returns rows changed after a sequence number"""
+from datetime import timedelta
+
+from app import db
+from changes import compact_changes
+
+
+def get_changes(client, since, **args):
+    return client.get('/api/changes', query_string={'since': since, **args})
+
+
+def create_routine(client, name):
+    response = client.post('/api/routines', json={'name': name, 'day_of_week': 'Monday'})
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+
+def test_returns_upserts_and_tombstones_since_a_seq(client):
+    leg_day = create_routine(client, 'Leg Day')
+    start = get_changes(client, 0).get_json()['seq']
+    pull_day = create_routine(client, 'Pull Day')
+    assert client.delete(f'/api/routines/{leg_day}').status_code == 200
+
+    body = get_changes(client, start).get_json()
+
+    assert body['since'] == start
+    assert body['seq'] > start
+    assert body['more'] is False
+    assert [routine['id'] for routine in body['upserts']['routines']] == [pull_day]
+    assert body['tombstones']['routines'] == [leg_day]
+
+    # Nothing changed after the returned seq
+    body = get_changes(client, body['seq']).get_json()
+    assert body['upserts']['routines'] == [] and body['tombstones']['routines'] == []
+
+
+def test_pages_with_limit(client):
+    for name in ('Leg Day', 'Pull Day', 'Push Day'):
+        create_routine(client, name)
+
+    first = get_changes(client, 0, limit=2).get_json()
+    second = get_changes(client, first['seq'], limit=2).get_json()
+
+    assert first['more'] is True and second['more'] is False
+    names = [routine['name'] for page in (first, second) for routine in page['upserts']['routines']]
+    assert names == ['Leg Day', 'Pull Day', 'Push Day']
+
+
+def test_since_behind_the_horizon_is_gone(client):
+    routine_id = create_routine(client, 'Leg Day')
+    assert client.delete(f'/api/routines/{routine_id}').status_code == 200
+    seq = get_changes(client, 0).get_json()['seq']
+    # Dropping the tombstone moves the horizon past it
+    compact_changes(db.session, timedelta(0))
+    db.session.commit()
+
+    response = get_changes(client, 0)
+
+    assert response.status_code == 410
+    assert response.get_json()['seq'] == seq
+    assert get_changes(client, seq).status_code == 200
+
+
+def test_rejects_bad_arguments(client):
+    assert get_changes(client, -1).status_code == 400
+    assert get_changes(client, 0, limit=0).status_code == 400
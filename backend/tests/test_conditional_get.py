@@ -0,0 +1,53 @@
+"""ETags from version counters answer repeat GETs with 304"""
+import pytest
+
+from app import db
+from models import Routine
+
+
+@pytest.fixture
+def routines(app):
+    # Enough rows that the list is over COMPRESS_MIN_SIZE
+    db.session.add_all(Routine(name=f'Routine {i}', day_of_week='Monday') for i in range(50))
+    db.session.commit()
+
+
+def test_matching_etag_gets_304(client, routines):
+    response = client.get('/api/routines')
+    etag, weak = response.get_etag()
+    assert response.status_code == 200
+    assert etag and not weak
+
+    response = client.get('/api/routines', headers={'If-None-Match': f'"{etag}"'})
+
+    assert response.status_code == 304
+    assert response.get_etag() == (etag, False)
+    assert response.get_data() == b''
+
+
+def test_write_changes_etag(client, routines):
+    etag, _ = client.get('/api/routines').get_etag()
+
+    assert client.post('/api/routines', json={'name': 'Leg Day', 'day_of_week': 'Friday'}).status_code == 201
+
+    response = client.get('/api/routines', headers={'If-None-Match': f'"{etag}"'})
+    assert response.status_code == 200
+    assert response.get_etag()[0] != etag
+
+
+def test_query_string_is_part_of_etag(client, routines):
+    first, _ = client.get('/api/routines?limit=10').get_etag()
+    second, _ = client.get('/api/routines?limit=20').get_etag()
+    assert first != second
+
+
+def test_compressed_response_has_weak_etag_that_still_matches(client, routines):
+    response = client.get('/api/routines', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    etag, weak = response.get_etag()
+    assert weak
+    assert etag == client.get('/api/routines').get_etag()[0]
+
+    response = client.get('/api/routines', headers={'Accept-Encoding': 'gzip', 'If-None-Match': f'W/"{etag}"'})
+
+    assert response.status_code == 304
@@ -0,0 +1,90 @@
+"""/api/events streams change log entries as Server-Sent Events"""
+import json
+
+import pytest
+
+from app import db
+from changes import reset_changes
+from events import event_hub
+
+
+@pytest.fixture
+def hub(app, monkeypatch):
+    """The event hub without its dispatcher thread; tests call _dispatch()
+
+    A background thread would share the one in-memory connection with
+    the test.
+    """
+    monkeypatch.setattr(event_hub, '_start', lambda: None)
+    monkeypatch.setattr(event_hub, '_last_seq', 0)
+    return event_hub
+
+
+def open_stream(client, last_event_id=None):
+    headers = {'Last-Event-ID': str(last_event_id)} if last_event_id is not None else {}
+    response = client.get('/api/events', headers=headers, buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    return response, iter(response.response)
+
+
+def parse(chunk):
+    """Get the events in a chunk as dicts of their fields"""
+    events = []
+    for block in chunk.decode().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if ': ' in line)
+        if 'event' in fields:
+            fields['data'] = json.loads(fields['data'])
+            events.append(fields)
+    return events
+
+
+def create_routine(client, name):
+    response = client.post('/api/routines', json={'name': name, 'day_of_week': 'Monday'})
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+
+def test_pushes_a_change_event_for_each_commit(client, hub):
+    response, chunks = open_stream(client)
+    assert next(chunks) == b'retry: 3000\n\n'
+
+    routine_id = create_routine(client, 'Leg Day')
+    hub._dispatch()
+
+    [event] = parse(next(chunks))
+    assert event['event'] == 'change'
+    assert event['id'] == str(event['data']['seq'])
+    assert {'table': 'routines', 'id': routine_id, 'deleted': False} in event['data']['changes']
+    response.close()
+    assert not hub._subscribers
+
+
+def test_replays_changes_after_last_event_id(client, hub):
+    create_routine(client, 'Leg Day')
+    seen = client.get('/api/changes').get_json()['seq']
+    routine_id = create_routine(client, 'Pull Day')
+
+    response, chunks = open_stream(client, last_event_id=seen)
+
+    [event] = parse(next(chunks))
+    assert event['event'] == 'change'
+    assert [change['id'] for change in event['data']['changes'] if change['table'] == 'routines'] == [routine_id]
+    response.close()
+
+
+def test_asks_to_resync_from_behind_the_horizon(client, hub):
+    create_routine(client, 'Leg Day')
+    reset_changes(db.session)
+    db.session.commit()
+
+    response, chunks = open_stream(client, last_event_id=0)
+
+    [event] = parse(next(chunks))
+    assert event == {'event': 'resync', 'data': {'since': 0}}
+    response.close()
+
+
+def test_rejects_bad_last_event_id(client, hub):
+    response = client.get('/api/events', headers={'Last-Event-ID': 'abc'})
+    assert response.status_code == 400
@@ -0,0 +1,66 @@
+"""Group commit runs a group of writes in one transaction"""
+import pytest
+from sqlalchemy.orm import Session
+
+from app import db
+from group_commit import group_commit
+from models import Exercise
+
+
+@pytest.fixture
+def writer(app, monkeypatch):
+    """The group commit queue, on, taking two writes per group"""
+    monkeypatch.setattr(group_commit, 'enabled', True)
+    monkeypatch.setattr(group_commit, 'max_size', 2)
+    # Long enough that both writes always land in one group
+    monkeypatch.setattr(group_commit, 'window', 5)
+    # The writer shares the one in-memory connection
+    db.session.remove()
+    return group_commit
+
+
+def add_exercise(name):
+    def work():
+        exercise = Exercise(name=name, muscle_group='Legs', equipment='Barbell')
+        db.session.add(exercise)
+        db.session.flush()
+        return exercise.id
+    return work
+
+
+def fail():
+    db.session.add(Exercise(name='Half done', muscle_group='Legs', equipment='Barbell'))
+    db.session.flush()
+    raise ValueError('bad write')
+
+
+def test_group_commits_together(writer):
+    first = writer.submit(add_exercise('Front Squat'))
+    second = writer.submit(add_exercise('Back Squat'))
+
+    assert {first.result(), second.result()} == {1, 2}
+    assert sorted(e.name for e in Exercise.query) == ['Back Squat', 'Front Squat']
+
+
+def test_failed_write_is_rolled_back_alone(writer):
+    failed = writer.submit(fail)
+    saved = writer.submit(add_exercise('Front Squat'))
+
+    with pytest.raises(ValueError):
+        failed.result()
+    assert saved.result()
+    assert [e.name for e in Exercise.query] == ['Front Squat']
+
+
+def test_failed_commit_saves_nothing(writer, monkeypatch):
+    def commit(self):
+        raise RuntimeError('disk I/O error')
+    monkeypatch.setattr(Session, 'commit', commit)
+
+    futures = [writer.submit(add_exercise('Front Squat')), writer.submit(add_exercise('Back Squat'))]
+
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result()
+    monkeypatch.undo()
+    assert Exercise.query.count() == 0
@@ -0,0 +1,63 @@
+"""Read endpoints issue a constant number of SQL statements
+
+Seeds the database at a few sizes and counts the statements each request
+sends to SQLite. The count must not grow with the data.
+"""
+import pytest
+
+from app import db
+from models import Exercise, Routine, Variation
+
+SIZES = [10, 100, 1000]
+VARIATIONS_PER_ROUTINE = 5
+
+
+def seed(routine_count):
+    """Reset the database and fill it with routine_count routines
+
+    The first routine gets routine_count variations so the per-routine
+    endpoints grow along with the list.
+    """
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+
+    exercises = [
+        Exercise(name=f'Exercise {i}', muscle_group='Chest', equipment='None')
+        for i in range(max(routine_count // 2, 1))
+    ]
+    db.session.add_all(exercises)
+    db.session.flush()
+
+    for i in range(routine_count):
+        routine = Routine(name=f'Routine {i}', day_of_week='Monday')
+        variation_count = routine_count if i == 0 else VARIATIONS_PER_ROUTINE
+        for j in range(variation_count):
+            exercise = exercises[(i + j) % len(exercises)]
+            routine.variations.append(
+                Variation(exercise_id=exercise.id, name=f'{exercise.name} Variation')
+            )
+        db.session.add(routine)
+    db.session.commit()
+
+
+# Routine 1 gets one variation per routine seeded
+@pytest.mark.parametrize('path', [
+    '/api/routines',
+    '/api/routines/1',
+    '/api/routines/1/variations',
+    '/api/routines/1/exercises',
+    '/api/routines/1/variations/1',
+    '/api/exercises',
+    '/api/exercises?limit=20',
+    '/api/exercises?search=exercise&limit=20',
+    '/api/exercises/1',
+])
+def test_query_count_does_not_grow_with_data(app, client, capture_statements, path):
+    # Fill per-process caches first, like whether the search index exists
+    client.get(path)
+    counts = {}
+    for size in SIZES:
+        seed(size)
+        counts[size] = len(capture_statements(path))
+    assert len(set(counts.values())) == 1, f'query count grows with the data: {counts}'
@@ -0,0 +1,73 @@
+"""Read endpoints look rows up through indexes
+
+Seeds the demo data, records every SELECT a request sends to SQLite and
+runs EXPLAIN QUERY PLAN on it. A full table scan fails the test unless the
+endpoint lists that table as one it is expected to read in full (like the
+unfiltered routine list).
+"""
+import re
+
+import pytest
+
+from app import db
+from seed import seed_database
+
+# Endpoints to check, with the tables each one may scan in full
+PATHS = {
+    '/api/routines': {'routines'},
+    '/api/routines?limit=2': {'routines'},
+    '/api/routines?limit=2&after=1': set(),
+    '/api/routines?fields=name&include=variations': {'routines'},
+    '/api/routines/1': set(),
+    '/api/routines/1/variations': set(),
+    '/api/routines/1/variations/1': set(),
+    '/api/routines/1/exercises': set(),
+    '/api/exercises': {'exercises'},
+    '/api/exercises?limit=2&after=1': set(),
+    '/api/exercises?muscle_group=Chest': set(),
+    '/api/exercises?equipment=Barbell': set(),
+    '/api/exercises?muscle_group=Chest&equipment=Barbell': set(),
+    '/api/exercises?search=press': set(),
+    '/api/exercises?search=press&limit=2': set(),
+    '/api/exercises/1': set(),
+    '/api/variation-types': set(),
+    '/api/stats': {'routines', 'variations', 'exercises'},
+    '/api/stats?routine_id=1': set(),
+    '/api/stats?day_of_week=Monday': set(),
+    '/api/changes?since=20': set(),
+}
+
+# "SCAN variations_1" or "SCAN variations USING INDEX ..."; virtual tables
+# (full-text search) and subqueries are not base table scans
+SCAN = re.compile(r'^SCAN (\w+)(?!\w| VIRTUAL TABLE)')
+
+
+def scanned_tables(connection, statement, parameters):
+    """Return the base tables a statement's query plan scans in full"""
+    tables = set()
+    plan = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)
+    for row in plan:
+        match = SCAN.match(row.detail)
+        if match is None:
+            continue
+        name = match.group(1)
+        # Aliased tables show up as e.g. variations_1
+        if name not in db.metadata.tables:
+            name = name.rsplit('_', 1)[0]
+        if name in db.metadata.tables:
+            tables.add(name)
+    return tables
+
+
+@pytest.mark.parametrize('path, allowed', PATHS.items(), ids=list(PATHS))
+def test_no_unexpected_table_scans(app, capture_statements, path, allowed):
+    seed_database()
+    statements = [
+        (statement, parameters) for statement, parameters in capture_statements(path)
+        if statement.lstrip().upper().startswith('SELECT')
+    ]
+    scans = set()
+    with db.engine.connect() as connection:
+        for statement, parameters in statements:
+            scans |= scanned_tables(connection, statement, parameters)
+    assert not scans - allowed, f'{path} scans {", ".join(sorted(scans - allowed))} without an index'
@@ -0,0 +1,60 @@
+"""Cached responses are dropped or skipped once their data changes"""
+import pytest
+
+from app import db
+from cache import cache, MemoryBackend
+from models import Exercise, Routine
+
+
+@pytest.fixture
+def response_cache(app, monkeypatch):
+    """The response cache, on and empty (the tests run with CACHE_TTL=0)"""
+    monkeypatch.setattr(cache, 'ttl', 300)
+    monkeypatch.setattr(cache, 'backend', MemoryBackend())
+    monkeypatch.setattr(cache, 'hits', 0)
+    monkeypatch.setattr(cache, 'misses', 0)
+    return cache
+
+
+@pytest.fixture
+def catalog(app):
+    db.session.add_all([Exercise(name='Front Squat'), Routine(name='Leg Day', day_of_week='Monday')])
+    db.session.commit()
+
+
+def exercise_list(client):
+    response = client.get('/api/exercises')
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_repeat_get_is_served_from_cache(client, catalog, response_cache):
+    first = exercise_list(client)
+    second = exercise_list(client)
+
+    assert second == first
+    assert (response_cache.hits, response_cache.misses) == (1, 1)
+
+
+def test_commit_invalidates_what_it_touched(client, catalog, response_cache):
+    assert exercise_list(client)[0]['variations'] == []
+    assert client.get('/api/exercises/1').status_code == 200
+    assert len(response_cache.backend) == 2
+
+    response = client.post('/api/routines/1/variations', json={'exercise_id': 1, 'name': 'Paused Front Squat'})
+    assert response.status_code == 201
+
+    assert len(response_cache.backend) == 0
+    assert [v['name'] for v in exercise_list(client)[0]['variations']] == ['Paused Front Squat']
+
+
+def test_commit_from_another_worker_is_not_served_stale(client, catalog, response_cache, monkeypatch):
+    exercise_list(client)
+    # Another worker's commit can't reach this process's memory backend
+    monkeypatch.setattr(response_cache.backend, 'invalidate', lambda namespace: None)
+
+    response = client.post('/api/exercises', json={'name': 'Deadlift'})
+    assert response.status_code == 201
+
+    assert [e['name'] for e in exercise_list(client)] == ['Front Squat', 'Deadlift']
+    assert response_cache.hits == 0
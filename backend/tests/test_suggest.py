@@ -0,0 +1,38 @@
+"""The suggestion index follows writes"""
+import pytest
+
+import app as app_module
+from suggest import SuggestIndex
+
+
+@pytest.fixture
+def suggest_index(app, monkeypatch):
+    """A fresh index, since the app's one was built from earlier tests' tables"""
+    index = SuggestIndex()
+    monkeypatch.setattr(app_module, 'suggest_index', index)
+    return index
+
+
+def create_exercise(client, name):
+    response = client.post('/api/exercises', json={'name': name, 'muscle_group': 'Legs', 'equipment': 'Barbell'})
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['id']
+
+
+def suggest(client, query):
+    response = client.get('/api/exercises/suggest', query_string={'q': query})
+    assert response.status_code == 200, response.get_json()
+    return [item['name'] for item in response.get_json()]
+
+
+def test_suggests_exercise_created_with_new_word(client, suggest_index):
+    create_exercise(client, 'Back Squat')
+    assert suggest(client, 'squat') == ['Back Squat']
+
+    create_exercise(client, 'Zercher Squat')
+
+    assert suggest(client, 'zer') == ['Zercher Squat']
+    # Later writes still reach the index
+    create_exercise(client, 'Zercher Carry')
+    assert suggest(client, 'zercher') == ['Zercher Carry', 'Zercher Squat']
+
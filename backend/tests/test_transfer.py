@@ -0,0 +1,76 @@
+"""NDJSON export and import"""
+import json
+
+from app import db
+from models import Exercise, Routine, Variation
+
+
+def ndjson(*records):
+    return ''.join(json.dumps(record) + '\n' for record in records)
+
+
+def variation_parents():
+    return sorted(
+        (variation.name, variation.exercise.name, variation.routine.name)
+        for variation in Variation.query
+    )
+
+
+def test_import_attaches_variations_to_the_imported_parents(client):
+    # Rows already here take the low ids, so none of the file's ids survive
+    db.session.add_all([
+        Exercise(name='Existing Exercise'),
+        Routine(name='Existing Routine', day_of_week='Monday'),
+    ])
+    db.session.commit()
+    body = ndjson(
+        {'table': 'exercises', 'id': 7, 'name': 'Front Squat'},
+        {'table': 'exercises', 'id': 3, 'name': 'Deadlift'},
+        {'table': 'routines', 'id': 20, 'name': 'Pull Day', 'day_of_week': 'Tuesday'},
+        {'table': 'routines', 'id': 10, 'name': 'Leg Day', 'day_of_week': 'Monday'},
+        {'table': 'variations', 'id': 1, 'exercise_id': 7, 'routine_id': 10, 'name': 'Paused Front Squat'},
+        {'table': 'variations', 'id': 2, 'exercise_id': 3, 'routine_id': 20, 'name': 'Sumo Deadlift'},
+        {'table': 'variations', 'id': 3, 'exercise_id': 3, 'routine_id': 10, 'name': 'Deficit Deadlift'},
+    )
+
+    response = client.post('/api/import', data=body)
+
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json() == {'imported': {'exercises': 2, 'routines': 2, 'variations': 3}}
+    assert variation_parents() == [
+        ('Deficit Deadlift', 'Deadlift', 'Leg Day'),
+        ('Paused Front Squat', 'Front Squat', 'Leg Day'),
+        ('Sumo Deadlift', 'Deadlift', 'Pull Day'),
+    ]
+
+
+def test_export_imports_back_into_an_empty_database(client):
+    exercise = Exercise(name='Front Squat', muscle_group='Legs', equipment='Barbell')
+    routine = Routine(name='Leg Day', day_of_week='Monday', description='Heavy')
+    routine.variations.append(Variation(exercise=exercise, name='Paused Front Squat', variation_type='Tempo'))
+    db.session.add_all([Exercise(name='Deadlift'), routine])
+    db.session.commit()
+    exported = client.get('/api/export').get_data(as_text=True)
+
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    response = client.post('/api/import', data=exported)
+
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json() == {'imported': {'exercises': 2, 'routines': 1, 'variations': 1}}
+    # Empty tables hand out the same ids again, so the export matches exactly
+    assert client.get('/api/export').get_data(as_text=True) == exported
+
+
+def test_import_rejects_variation_before_its_parent(client):
+    body = ndjson(
+        {'table': 'routines', 'id': 1, 'name': 'Leg Day', 'day_of_week': 'Monday'},
+        {'table': 'variations', 'id': 1, 'exercise_id': 1, 'routine_id': 1, 'name': 'Front Squat'},
+    )
+
+    response = client.post('/api/import', data=body)
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Line 2: exercise_id 1 was not imported before this variation'}
+    assert Routine.query.count() == 0
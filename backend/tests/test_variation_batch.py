@@ -0,0 +1,81 @@
+"""Variation batches apply all of their operations or none"""
+import pytest
+
+from app import db
+from models import Exercise, Routine, Variation
+
+
+@pytest.fixture
+def routine(app):
+    exercise = Exercise(name='Front Squat')
+    routine = Routine(name='Leg Day', day_of_week='Monday')
+    routine.variations.append(Variation(exercise=exercise, name='Paused Front Squat'))
+    db.session.add(routine)
+    db.session.commit()
+    return routine.id
+
+
+def post_batch(client, routine_id, operations):
+    return client.post(f'/api/routines/{routine_id}/variations/batch', json=operations)
+
+
+@pytest.mark.parametrize('operation, error', [
+    ({'op': 'create', 'exercise_id': '1'}, 'Exercise ID must be an integer'),
+    ({'op': 'create', 'exercise_id': [1]}, 'Exercise ID must be an integer'),
+    ({'op': 'create', 'exercise_id': True}, 'Exercise ID must be an integer'),
+    ({'op': 'update', 'id': {'id': 1}, 'name': 'Renamed'}, 'Variation ID must be an integer'),
+    ({'op': 'delete', 'id': '1'}, 'Variation ID must be an integer'),
+])
+def test_rejects_ids_that_are_not_integers(client, routine, operation, error):
+    response = post_batch(client, routine, [{'op': 'create', 'exercise_id': 1}, operation])
+
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body['results'][1] == {'index': 1, 'op': operation['op'], 'status': 400, 'error': error}
+    assert Variation.query.count() == 1
+
+
+def test_applies_every_operation(client, routine):
+    response = post_batch(client, routine, [
+        {'op': 'create', 'exercise_id': 1, 'name': 'Box Squat'},
+        {'op': 'update', 'id': 1, 'name': 'Tempo Front Squat'},
+    ])
+
+    assert response.status_code == 200
+    assert response.get_json() == {'results': [
+        {'index': 0, 'op': 'create', 'status': 201, 'id': 2},
+        {'index': 1, 'op': 'update', 'status': 200, 'id': 1},
+    ]}
+    assert sorted(v.name for v in Variation.query) == ['Box Squat', 'Tempo Front Squat']
+
+    response = post_batch(client, routine, [{'op': 'delete', 'id': 2}])
+
+    assert response.status_code == 200
+    assert [v.name for v in Variation.query] == ['Tempo Front Squat']
+
+
+@pytest.mark.parametrize('operation, status, error', [
+    ({'op': 'create', 'exercise_id': 99}, 404, 'Exercise not found'),
+    ({'op': 'delete', 'id': 99}, 404, 'Variation not found in this routine'),
+    ({'op': 'update', 'id': 1, 'name': 'Twice'}, 400, 'Variation 1 appears in more than one operation'),
+    ({'op': 'rename', 'id': 1}, 400, 'op must be one of create, update, delete'),
+    ({'op': 'create'}, 400, 'Exercise ID is required'),
+])
+def test_one_bad_operation_applies_nothing(client, routine, operation, status, error):
+    response = post_batch(client, routine, [
+        {'op': 'create', 'exercise_id': 1, 'name': 'Box Squat'},
+        {'op': 'update', 'id': 1, 'name': 'Tempo Front Squat'},
+        operation,
+    ])
+
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body['error'] == 'No changes were applied'
+    assert [result['status'] for result in body['results']] == [201, 200, status]
+    assert body['results'][2]['error'] == error
+    assert [v.name for v in Variation.query] == ['Paused Front Squat']
+
+
+def test_rejects_bad_requests(client, routine):
+    assert post_batch(client, 99, []).status_code == 404
+    assert post_batch(client, routine, {'op': 'create'}).status_code == 400
@@ -0,0 +1,152 @@
+import heapq
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class RequestTimer:
+    """Time and statements spent on one request, split by phase"""
+
+    def __init__(self, keep_statements=0):
+        self.start = time.perf_counter()
+        self.durations = {'db': 0.0, 'serialize': 0.0, 'encode': 0.0}
+        self.statement_count = 0
+        # Heap of the keep_statements slowest (seconds, position, statement,
+        # parameters), only kept when slow requests are logged
+        self.keep_statements = keep_statements
+        self.statements = [] if keep_statements else None
+        self._active = set()
+
+    def add_statement(self, statement, parameters, elapsed, executemany):
+        if len(self.statements) >= self.keep_statements and elapsed <= self.statements[0][0]:
+            return
+        # Parameter lists of executemany can hold a whole import
+        parameters = f'[{len(parameters)} parameter sets]' if executemany else repr(parameters)[:200]
+        entry = (elapsed, self.statement_count, statement, parameters)
+        if len(self.statements) < self.keep_statements:
+            heapq.heappush(self.statements, entry)
+        else:
+            heapq.heapreplace(self.statements, entry)
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.start
+
+
+def current_timer():
+    return g.get('request_timer') if has_request_context() else None
+
+
+def timed(phase):
+    """Add the time spent in the decorated function to the request's phase
+
+    Nested calls are only counted once, and SQL run inside the function
+    (lazy loads during serialization) stays in the db phase.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            timer = current_timer()
+            if timer is None or phase in timer._active:
+                return func(*args, **kwargs)
+            timer._active.add(phase)
+            db_before = timer.durations['db']
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                timer.durations[phase] += elapsed - (timer.durations['db'] - db_before)
+                timer._active.discard(phase)
+        return wrapper
+    return decorator
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('statement_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _end_statement(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['statement_start'].pop()
+    timer = current_timer()
+    if timer is None:
+        return
+    timer.durations['db'] += elapsed
+    if timer.statements is not None:
+        timer.add_statement(statement, parameters, elapsed, executemany)
+    timer.statement_count += 1
+
+
+class RequestTiming:
+    """Server-Timing header and slow request log for every request
+
+    The header splits the request into db, serialize and encode time plus
+    the total, with the statement count in the db entry's description
+    and in X-Query-Count. Requests over SLOW_REQUEST_MS or
+    SLOW_REQUEST_QUERIES are logged as a warning with their
+    SLOW_REQUEST_STATEMENTS slowest statements, in the order they ran.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.slow_ms = 0
+        self.slow_queries = 0
+        self.max_statements = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config['SERVER_TIMING']
+        self.slow_ms = app.config['SLOW_REQUEST_MS']
+        self.slow_queries = app.config['SLOW_REQUEST_QUERIES']
+        self.max_statements = app.config['SLOW_REQUEST_STATEMENTS']
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    @property
+    def logs_slow_requests(self):
+        return self.slow_ms > 0 or self.slow_queries > 0
+
+    def _start(self):
+        if self.enabled or self.logs_slow_requests:
+            g.request_timer = RequestTimer(self.max_statements if self.logs_slow_requests else 0)
+
+    def _finish(self, response):
+        timer = g.pop('request_timer', None)
+        if timer is None:
+            return response
+        total = timer.total
+
+        if self.enabled:
+            durations = timer.durations
+            response.headers['Server-Timing'] = ', '.join([
+                f'db;dur={durations["db"] * 1000:.2f};desc="{timer.statement_count} queries"',
+                f'serialize;dur={durations["serialize"] * 1000:.2f}',
+                f'encode;dur={durations["encode"] * 1000:.2f}',
+                f'total;dur={total * 1000:.2f}',
+            ])
+            response.headers['X-Query-Count'] = str(timer.statement_count)
+
+        too_slow = self.slow_ms > 0 and total * 1000 > self.slow_ms
+        too_many = self.slow_queries > 0 and timer.statement_count > self.slow_queries
+        if too_slow or too_many:
+            path = request.full_path.rstrip('?')
+            lines = [
+                f'Slow request: {request.method} {path} took {total * 1000:.1f}ms '
+                f'with {timer.statement_count} queries ({timer.durations["db"] * 1000:.1f}ms in the database)'
+            ]
+            statements = sorted(timer.statements or [], key=lambda entry: entry[1])
+            if statements and len(statements) < timer.statement_count:
+                lines.append(f'  the {len(statements)} slowest statements:')
+            for elapsed, _, statement, parameters in statements:
+                lines.append(f'  {elapsed * 1000:8.2f}ms  {" ".join(statement.split())}  {parameters}')
+            current_app.logger.warning('\n'.join(lines))
+        return response
+
+
+request_timing = RequestTiming()
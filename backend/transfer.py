@@ -0,0 +1,189 @@
+import json
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import DateTime, inspect, select
+
+from bulk import bulk_insert
+from changes import log_changes
+from models import db, Exercise, Routine, Variation
+from sqlite_profile import begin_write
+from variation_types import add_missing_types
+from versions import record_changes
+
+# Models in the order an import needs them: variations point at both others
+MODELS = {
+    'exercises': Exercise,
+    'routines': Routine,
+    'variations': Variation,
+}
+TABLES = {name: model.__table__ for name, model in MODELS.items()}
+
+# Importable columns of each table, and whether each one holds a datetime
+COLUMNS = {
+    name: [(column.key, isinstance(column.type, DateTime)) for column in table.columns if not column.primary_key]
+    for name, table in TABLES.items()
+}
+
+# Rows fetched per round trip on export and inserted per statement on import
+CHUNK_SIZE = 1000
+
+
+def _encode(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def export_lines(tables=TABLES):
+    """Yield the rows of each table as NDJSON, one chunk of lines at a time
+
+    Every line carries its table name, so exports of several tables can be
+    concatenated into one import stream. Rows are streamed with yield_per,
+    so memory use doesn't depend on the table size.
+    """
+    for name in tables:
+        table = TABLES[name]
+        result = db.session.execute(
+            select(table).order_by(table.c.id).execution_options(yield_per=CHUNK_SIZE)
+        )
+        for rows in result.partitions():
+            yield ''.join(
+                json.dumps({'table': name, **{key: _encode(value) for key, value in row._mapping.items()}}) + '\n'
+                for row in rows
+            )
+
+
+class CatalogImport:
+    """Insert NDJSON rows from export_lines() under new ids
+
+    Rows are buffered per table and bulk inserted CHUNK_SIZE at a time.
+    Exercise and routine ids are remapped to the ids they get here, so a
+    variation must come after the exercise and routine it points at. Only
+    those two id maps grow with the input; variations are not kept.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.id_maps = {'exercises': {}, 'routines': {}}
+        self.counts = dict.fromkeys(TABLES, 0)
+        self._table = None
+        self._pending = []  # (old id, row) for self._table
+        # Bulk inserts skip the ORM, so the models' @validates methods are
+        # called on the rows directly, with a blank instance as self
+        self._blanks = {name: model() for name, model in MODELS.items()}
+
+    def _validate(self, name, row):
+        for key, (validator, _) in inspect(MODELS[name]).validators.items():
+            if key in row:
+                row[key] = validator(self._blanks[name], key, row[key])
+
+    def add_line(self, line_number, line):
+        if not line.strip():
+            return
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise ValueError(f"Line {line_number}: invalid JSON")
+        if not isinstance(record, dict) or record.get('table') not in TABLES:
+            raise ValueError(f"Line {line_number}: table must be one of {', '.join(TABLES)}")
+
+        name = record['table']
+        row = {}
+        for key, is_datetime in COLUMNS[name]:
+            if key not in record:
+                continue
+            value = record[key]
+            if is_datetime and value is not None:
+                try:
+                    value = datetime.fromisoformat(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"Line {line_number}: {key} must be an ISO 8601 datetime") from None
+            row[key] = value
+        if not row.get('name'):
+            raise ValueError(f"Line {line_number}: name is required")
+        try:
+            self._validate(name, row)
+        except ValueError as e:
+            raise ValueError(f"Line {line_number}: {e}") from None
+
+        if name == 'variations':
+            for key, parent in (('exercise_id', 'exercises'), ('routine_id', 'routines')):
+                # Parents still waiting in the buffer get their ids on flush
+                if self._table == parent:
+                    self.flush()
+                if record.get(key) not in self.id_maps[parent]:
+                    raise ValueError(
+                        f"Line {line_number}: {key} {record.get(key)} was not imported before this variation"
+                    )
+                row[key] = self.id_maps[parent][record[key]]
+
+        if name != self._table or len(self._pending) >= CHUNK_SIZE:
+            self.flush()
+            self._table = name
+        self._pending.append((record.get('id'), row))
+
+    def flush(self):
+        """Insert the buffered rows"""
+        if not self._pending:
+            return
+        name, pending = self._table, self._pending
+        self._pending = []
+        rows = [row for _, row in pending]
+
+        if name == 'variations':
+            add_missing_types(self.session, {row.get('variation_type') for row in rows})
+            self.session.flush()
+        new_ids = bulk_insert(self.session, TABLES[name], rows)
+        if name in self.id_maps:
+            self.id_maps[name].update((old_id, new_id) for (old_id, _), new_id in zip(pending, new_ids))
+        self.counts[name] += len(rows)
+
+        # Imported variations only point at imported routines and exercises,
+        # whose versions are bumped as they are inserted
+        if name == 'exercises':
+            record_changes(self.session, {name}, exercise_ids=new_ids)
+        elif name == 'routines':
+            record_changes(self.session, {name}, routine_ids=new_ids)
+        else:
+            record_changes(self.session, {name})
+        log_changes(self.session, ((name, row_id, False) for row_id in new_ids))
+
+
+def import_lines(lines):
+    """Import NDJSON lines in one transaction and return row counts per table
+
+    Raises ValueError, after rolling back, if any line is invalid.
+    """
+    importer = CatalogImport(db.session)
+    begin_write(db.session)
+    try:
+        for line_number, line in enumerate(lines, 1):
+            importer.add_line(line_number, line)
+        importer.flush()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return importer.counts
+
+
+@click.command('export')
+@click.argument('tables', nargs=-1, type=click.Choice(list(TABLES)))
+@click.option('-o', '--output', type=click.File('w'), default='-', help='File to write, stdout by default')
+@with_appcontext
+def export_command(tables, output):
+    """Export exercises, routines and variations as NDJSON"""
+    for chunk in export_lines(tables or TABLES):
+        output.write(chunk)
+
+
+@click.command('import')
+@click.argument('input', type=click.File('r'), default='-')
+@with_appcontext
+def import_command(input):
+    """Import an NDJSON export, giving every row a new id"""
+    try:
+        counts = import_lines(input)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(', '.join(f'{count} {name}' for name, count in counts.items()) + ' imported', err=True)
@@ -0,0 +1,96 @@
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db, Variation, VariationType
+from serializers import serialize_all
+from versions import get_versions, on_commit
+
+# Types every database starts with
+DEFAULT_TYPES = [
+    'Standard',
+    'Width Variation',
+    'Angle Variation',
+    'Grip Variation',
+    'Tempo Variation',
+    'Power',
+    'Endurance',
+    'Other'
+]
+
+
+@event.listens_for(VariationType.__table__, 'after_create')
+def _insert_default_types(target, connection, **kw):
+    """Fill a table made by db.create_all(); migrations insert their own defaults"""
+    connection.execute(target.insert(), [
+        {'name': name, 'description': '', 'is_default': True} for name in DEFAULT_TYPES
+    ])
+
+
+class VariationTypeCache:
+    """Process-wide copy of the variation type list
+
+    Reloaded after this process commits a new type, and when the
+    variation_types version shows another worker has written one.
+    """
+
+    def __init__(self):
+        self._types = []
+        self._names = set()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        on_commit(self._on_commit)
+
+    def _on_commit(self, changes):
+        if 'variation_types' in changes['tables']:
+            self._version = None
+
+    def _refresh(self):
+        version = get_versions(['variation_types'])['variation_types']
+        if version == self._version:
+            return
+        types = VariationType.query.order_by(VariationType.name).all()
+        with self._lock:
+            self._types = serialize_all(types)
+            self._names = {t.name for t in types}
+            self._version = version
+
+    def all(self):
+        """Get every variation type as a dict, sorted by name"""
+        self._refresh()
+        return self._types
+
+    def names(self):
+        self._refresh()
+        return self._names
+
+
+variation_type_cache = VariationTypeCache()
+
+
+@event.listens_for(Session, 'before_flush')
+def _add_missing_types(session, flush_context, instances):
+    """Give every type used by a new or edited variation a variation_types row"""
+    used = {
+        obj.variation_type for obj in list(session.new) + list(session.dirty)
+        if isinstance(obj, Variation) and obj.variation_type
+    }
+    used -= {obj.name for obj in session.new if isinstance(obj, VariationType)}
+    add_missing_types(session, used)
+
+
+def add_missing_types(session, used):
+    """Add a variation_types row for each name in used that doesn't have one"""
+    used = set(used) - {None, ''}
+    if not used or not used - variation_type_cache.names():
+        return
+
+    # The cache can lag behind other workers, so check the table itself
+    existing = set(session.execute(
+        db.select(VariationType.name).where(VariationType.name.in_(used))
+    ).scalars())
+    for name in sorted(used - existing):
+        session.add(VariationType(name=name))
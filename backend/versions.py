@@ -0,0 +1,167 @@
+import hashlib
+from functools import wraps
+
+from flask import Response, request
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from metrics import record_cache_lookup
+from models import db, Exercise, Routine, Variation, VariationType, TableVersion
+
+
+def get_versions(keys):
+    """Get the current version of each key, 0 for keys never written"""
+    rows = db.session.execute(
+        select(TableVersion.key, TableVersion.version).where(TableVersion.key.in_(keys))
+    )
+    versions = dict.fromkeys(keys, 0)
+    versions.update(rows.all())
+    return versions
+
+
+def get_request_versions(keys):
+    """get_versions(), read once per request
+
+    A view's ETag and its cached body are then both derived from the same
+    versions, even if a commit lands while the request is running. They
+    are kept in the WSGI environ rather than g, since an app context can
+    outlive a request (the test client reuses one that is already pushed).
+    """
+    seen = request.environ.setdefault('workout_tracker.versions', {})
+    missing = [key for key in keys if key not in seen]
+    if missing:
+        seen.update(get_versions(missing))
+    return {key: seen[key] for key in keys}
+
+
+def bump_versions(connection, keys):
+    """Increment the version of each key inside the current transaction"""
+    keys = sorted(keys)
+    if not keys:
+        return
+    table = TableVersion.__table__
+    existing = set(connection.execute(select(table.c.key).where(table.c.key.in_(keys))).scalars())
+    if existing:
+        connection.execute(
+            update(table).where(table.c.key.in_(existing)).values(version=table.c.version + 1)
+        )
+    missing = [{'key': key, 'version': 1} for key in keys if key not in existing]
+    if missing:
+        connection.execute(table.insert(), missing)
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_changed_versions(session, flush_context):
+    """Bump the versions of every table touched by a flush"""
+    tables, routine_ids, exercise_ids = set(), set(), set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Routine):
+            tables.add('routines')
+            routine_ids.add(obj.id)
+        elif isinstance(obj, Variation):
+            tables.add('variations')
+            routine_ids.add(obj.routine_id)
+            exercise_ids.add(obj.exercise_id)
+        elif isinstance(obj, Exercise):
+            tables.add('exercises')
+            exercise_ids.add(obj.id)
+        elif isinstance(obj, VariationType):
+            tables.add('variation_types')
+    record_changes(session, tables, routine_ids, exercise_ids)
+
+
+def record_changes(session, tables, routine_ids=(), exercise_ids=()):
+    """Bump table versions and queue commit callbacks for changed rows
+
+    Called for every flush, and directly by code that writes through Core
+    statements, which bypass the flush.
+
+    Only the tables are versioned. Responses that nest rows from other
+    tables (a routine's exercises, their variations and those variations'
+    routines) use the versions of every table they read, so one write
+    bumps a fixed number of keys however many responses it affects.
+    routine_ids and exercise_ids are the rows written directly, passed on
+    to the commit callbacks.
+    """
+    if not tables:
+        return
+
+    tables = set(tables)
+    bump_versions(session.connection(), tables)
+
+    # Remember what changed so commit callbacks can act on it once the
+    # transaction is durable
+    changes = session.info.setdefault('changes', {'tables': set(), 'routines': set(), 'exercises': set()})
+    changes['tables'] |= tables
+    changes['routines'] |= set(routine_ids) - {None}
+    changes['exercises'] |= set(exercise_ids) - {None}
+
+
+# Callbacks run with the changes of each committed transaction
+_commit_callbacks = []
+
+
+def on_commit(callback):
+    """Register callback(changes) to run after every commit that changed data
+
+    changes has the touched table names under 'tables' and the ids of every
+    affected routine and exercise under 'routines' and 'exercises'.
+    """
+    _commit_callbacks.append(callback)
+    return callback
+
+
+@event.listens_for(Session, 'after_commit')
+def _run_commit_callbacks(session):
+    changes = session.info.pop('changes', None)
+    if changes:
+        for callback in _commit_callbacks:
+            callback(changes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('changes', None)
+
+
+def conditional_get(*keys):
+    """Answer GETs with an ETag built from version counters, or 304 if it matches
+
+    keys are version keys, such as the names of the tables the view
+    reads, and may reference view arguments. The query string is part of
+    the tag so filtered and sparse responses get their own tags. A matching
+    If-None-Match is answered before the view runs.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            resolved = [key.format(**kwargs) for key in keys]
+            versions = get_request_versions(resolved)
+            digest = hashlib.sha1(request.full_path.encode())
+            for key in resolved:
+                digest.update(f'|{key}={versions[key]}'.encode())
+            etag = digest.hexdigest()
+
+            # Weak comparison, as compressed responses carry a weak tag
+            matched = request.if_none_match.contains_weak(etag)
+            record_cache_lookup('etag', matched)
+            if matched:
+                response = Response(status=304)
+                response.set_etag(etag)
+                return response
+
+            result = view(*args, **kwargs)
+            if isinstance(result, Response):
+                # Streamed responses
+                if result.status_code == 200:
+                    result.set_etag(etag)
+                return result
+            if not isinstance(result, tuple):
+                result = (result, 200)
+            if result[1] != 200:
+                return result
+            headers = dict(result[2]) if len(result) > 2 else {}
+            headers['ETag'] = f'"{etag}"'
+            return result[0], result[1], headers
+        return wrapper
+    return decorator
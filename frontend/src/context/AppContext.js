@@ -54,26 +54,20 @@ function AppProvider({ children }) {
     try {
       console.log('Loading initial data...');
       
-      // Fetch routines
-      const routinesData = await api.getRoutines();
-      console.log('Received routines data:', routinesData);
+      // Fetch routines, exercises and variation types in one request
+      const bootstrapData = await api.getBootstrap();
+      console.log('Received bootstrap data:', bootstrapData);
+      
+      const routinesData = bootstrapData.routines;
       setRoutines(routinesData);
       
-      // Fetch exercises
-      const exercisesData = await api.getExercises();
-      console.log('Received exercises data:', exercisesData);
+      const exercisesData = bootstrapData.exercises;
       setExercises(exercisesData);
       
-      // Fetch variation types
-      try {
-        const variationTypesData = await api.getVariationTypes();
-        if (variationTypesData && Array.isArray(variationTypesData)) {
-          console.log('Received variation types data:', variationTypesData);
-          setVariationTypes(variationTypesData);
-        }
-      } catch (typeError) {
-        console.error('Error loading variation types:', typeError);
-        // Continue with default types if the API fails
+      // Keep the default types if the response has none
+      const variationTypesData = bootstrapData.variation_types;
+      if (variationTypesData && Array.isArray(variationTypesData)) {
+        setVariationTypes(variationTypesData);
       }
       
       // Extract unique muscle groups and equipment
@@ -46,6 +46,12 @@ const fetchWithErrorHandling = async (url, options = {}) => {
 
 // API methods
 const api = {
+  // Routines, exercises and variation types in one request; variations
+  // reference their exercise by exercise_id
+  getBootstrap: async () => {
+    return fetchWithErrorHandling(`${API_BASE_URL}/api/bootstrap`);
+  },
+
   // Routine endpoints
   getRoutines: async () => {
     return fetchWithErrorHandling(`${API_BASE_URL}/api/routines`);